@@ -102,6 +102,11 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # orjson кодирует Decimal/datetime в C, без JSONEncoder.default на каждое поле
+    'DEFAULT_RENDERER_CLASSES': (
+        'drf_orjson_renderer.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -157,6 +162,15 @@ CELERY_RESULT_BACKEND = 'redis://redis:6379'
 
 CELERY_TIMEZONE = 'Europe/Moscow'
 
+# TON
+
+# Адреса сервисного кошелька и арбитра для контрактов Deal
+TON_SERVICE_WALLET = os.environ.get('TON_SERVICE_WALLET', '')
+TON_ARBITER_WALLET = os.environ.get('TON_ARBITER_WALLET', '')
+
+# Время жизни кеша курсов валют (секунды), см. core.tasks.get_current_exchange_rate
+EXCHANGE_RATE_CACHE_TTL = int(os.environ.get('EXCHANGE_RATE_CACHE_TTL', 60))
+
 CELERY_BEAT_SCHEDULE = {
     'get-btc-price-every-hour': {
         'task': 'core.tasks.get_current_exchange_rate',
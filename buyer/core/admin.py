@@ -123,7 +123,7 @@ class DealAdmin(admin.ModelAdmin):
 class OnchainDealAdmin(admin.ModelAdmin):
     list_display = ['id', 'deal', 'contract_address', 'deployed_at']
     search_fields = ['contract_address', 'metadata_hash_hex', 'deal__id']
-    readonly_fields = ['deployed_at', 'updated_at']
+    readonly_fields = ['last_synced_lt', 'deployed_at', 'updated_at']
 
 
 @admin.register(Payment)
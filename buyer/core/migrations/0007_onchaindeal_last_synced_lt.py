@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-15 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_auto_20251210_0801'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='onchaindeal',
+            name='last_synced_lt',
+            field=models.BigIntegerField(blank=True, help_text='lt последней транзакции контракта на момент последней синхронизации статуса', null=True, verbose_name='Последний синхронизированный lt'),
+        ),
+    ]
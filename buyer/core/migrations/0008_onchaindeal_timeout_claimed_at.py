@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-15 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_onchaindeal_last_synced_lt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='onchaindeal',
+            name='timeout_claimed_at',
+            field=models.DateTimeField(blank=True, help_text='Время, когда воркер взял сделку для вызова метода контракта по тайм-ауту', null=True, verbose_name='Обработка тайм-аута начата'),
+        ),
+    ]
@@ -588,6 +588,18 @@ class OnchainDeal(models.Model):
     )
     contract_address = models.CharField(max_length=128)  # TON address
     metadata_hash_hex = models.CharField(max_length=128)
+    last_synced_lt = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Последний синхронизированный lt',
+        help_text='lt последней транзакции контракта на момент последней синхронизации статуса'
+    )
+    timeout_claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Обработка тайм-аута начата',
+        help_text='Время, когда воркер взял сделку для вызова метода контракта по тайм-ауту'
+    )
     deployed_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -107,9 +107,16 @@ class PaymentWebhookView(APIView):
             # Логируем webhook
             logger.info(f"Received webhook from {provider}: {webhook_data}")
             
-            # Асинхронно обрабатываем webhook через Celery
-            from core.tasks import process_payment_webhook
-            process_payment_webhook.delay(provider, webhook_data)
+            # Асинхронно обрабатываем webhook через Celery (сразу в задачу провайдера)
+            from core.tasks import WEBHOOK_TASKS
+            task = WEBHOOK_TASKS.get(provider)
+            if task is None:
+                logger.error(f"Unknown payment provider: {provider}")
+                return JsonResponse(
+                    {'error': 'Unknown payment provider'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            task.delay(webhook_data)
             
             # Сразу возвращаем 200 OK провайдеру
             return JsonResponse({'status': 'ok'}, status=status.HTTP_200_OK)
@@ -23,10 +23,23 @@ from core.models import (
 )
 
 
+# Статусы сделки, для которых можно открыть спор
+_DISPUTE_VALID_STATUS_ORDER = (
+    Deal.Status.NEW,
+    Deal.Status.FUNDED,
+    Deal.Status.PURCHASED,
+    Deal.Status.SHIPPED,
+)
+_DISPUTE_VALID_STATUSES = frozenset(_DISPUTE_VALID_STATUS_ORDER)
+_DISPUTE_INVALID_STATUS_MSG = (
+    f'Спор можно открыть только для сделок со статусами: {", ".join(_DISPUTE_VALID_STATUS_ORDER)}'
+)
+
+
 class BuyerProfileSerializer(serializers.ModelSerializer):
     """Сериализатор для профиля байера."""
 
-    user_full_name = serializers.CharField(source='user.get_full_name', read_only=True)
+    user_full_name = serializers.CharField(source='user.full_name', read_only=True)
     user_email = serializers.CharField(source='user.email', read_only=True)
 
     class Meta:
@@ -131,7 +144,7 @@ class OrderRequestCreateSerializer(serializers.ModelSerializer):
 class OrderRequestSerializer(serializers.ModelSerializer):
     """Сериализатор для заявки заказчика."""
 
-    customer_name = serializers.CharField(source='customer.get_full_name', read_only=True)
+    customer_name = serializers.CharField(source='customer.full_name', read_only=True)
     total_amount_rub = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     description = serializers.SerializerMethodField()
 
@@ -160,7 +173,7 @@ class OrderRequestSerializer(serializers.ModelSerializer):
 class OrderRequestForBuyerSerializer(serializers.ModelSerializer):
     """Сериализатор заявки для байера (без адреса доставки)."""
     
-    customer_name = serializers.CharField(source='customer.get_full_name', read_only=True)
+    customer_name = serializers.CharField(source='customer.full_name', read_only=True)
     total_amount_rub = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     description = serializers.SerializerMethodField()
 
@@ -244,8 +257,8 @@ class OrderBidSerializer(serializers.Serializer):
 class DealSerializer(serializers.ModelSerializer):
     """Сериализатор для сделки (для заказчика и админа)."""
 
-    customer_name = serializers.CharField(source='customer.get_full_name', read_only=True)
-    buyer_name = serializers.CharField(source='buyer.user.get_full_name', read_only=True)
+    customer_name = serializers.CharField(source='customer.full_name', read_only=True)
+    buyer_name = serializers.CharField(source='buyer.user.full_name', read_only=True)
     order_title = serializers.CharField(source='order.title', read_only=True)
     total_amount_ton = serializers.DecimalField(max_digits=18, decimal_places=9, read_only=True)
 
@@ -286,7 +299,7 @@ class DealSerializer(serializers.ModelSerializer):
 class DealForBuyerSerializer(serializers.ModelSerializer):
     """Сериализатор для сделки для байера (без адреса до PURCHASED)."""
 
-    customer_name = serializers.CharField(source='customer.get_full_name', read_only=True)
+    customer_name = serializers.CharField(source='customer.full_name', read_only=True)
     order_title = serializers.CharField(source='order.title', read_only=True)
     total_amount_ton = serializers.DecimalField(max_digits=18, decimal_places=9, read_only=True)
     
@@ -402,8 +415,8 @@ class DisputeSerializer(serializers.ModelSerializer):
     """Сериализатор для спора."""
 
     deal_id = serializers.IntegerField(source='deal.id', read_only=True)
-    opened_by_name = serializers.CharField(source='opened_by.get_full_name', read_only=True)
-    resolved_by_name = serializers.CharField(source='resolved_by.get_full_name', read_only=True)
+    opened_by_name = serializers.CharField(source='opened_by.full_name', read_only=True)
+    resolved_by_name = serializers.CharField(source='resolved_by.full_name', read_only=True)
 
     class Meta:
         model = Dispute
@@ -447,15 +460,9 @@ class DisputeCreateSerializer(serializers.ModelSerializer):
             })
 
         # Проверяем статус сделки - спор можно открыть для активных статусов
-        valid_statuses = [
-            Deal.Status.NEW,
-            Deal.Status.FUNDED,
-            Deal.Status.PURCHASED,
-            Deal.Status.SHIPPED
-        ]
-        if deal.status not in valid_statuses:
+        if deal.status not in _DISPUTE_VALID_STATUSES:
             raise serializers.ValidationError({
-                'error': f'Спор можно открыть только для сделок со статусами: {", ".join(valid_statuses)}'
+                'error': _DISPUTE_INVALID_STATUS_MSG
             })
 
         # Проверяем, что спор еще не открыт
@@ -482,8 +489,8 @@ class RatingSerializer(serializers.ModelSerializer):
     """Сериализатор для рейтинга."""
 
     deal_id = serializers.IntegerField(source='deal.id', read_only=True)
-    rated_by_name = serializers.CharField(source='rated_by.get_full_name', read_only=True)
-    rated_user_name = serializers.CharField(source='rated_user.get_full_name', read_only=True)
+    rated_by_name = serializers.CharField(source='rated_by.full_name', read_only=True)
+    rated_user_name = serializers.CharField(source='rated_user.full_name', read_only=True)
 
     class Meta:
         model = Rating
@@ -3,8 +3,7 @@
 """
 
 import os
-from decimal import Decimal
-from math import ceil
+from decimal import Decimal, ROUND_CEILING
 from typing import Dict, Tuple
 import logging
 
@@ -14,6 +13,8 @@ logger = logging.getLogger(__name__)
 # Конфигурация курсов и маржи
 EUR_TO_RUB_RATE = Decimal(os.getenv('EUR_TO_RUB_RATE', '100.0'))  # TODO: получать из сервиса курсов
 SHIPPING_MARGIN = Decimal(os.getenv('SHIPPING_MARGIN', '0.1'))  # 10% запас
+# Запас в базисных пунктах (0.1 -> 1000), чтобы считать бюджет в целых числах
+_SHIPPING_MARGIN_BPS = int(SHIPPING_MARGIN * 10000)
 CUSTOMS_LIMIT_EUR = Decimal('200.0')  # Лимит таможенной пошлины
 
 
@@ -61,6 +62,22 @@ DOMESTIC_SHIPPING_RATES: Dict[Tuple[str, str], Decimal] = {
 }
 
 
+def _to_kopecks(amount_rub: Decimal) -> int:
+    """Переводит сумму в рублях в целые копейки (с округлением вверх)."""
+    return int((amount_rub * 100).to_integral_value(rounding=ROUND_CEILING))
+
+
+def _budget_with_margin(cost_kopecks: int) -> Decimal:
+    """
+    Применяет запас SHIPPING_MARGIN и округляет вверх до 10 рублей.
+    
+    Вся арифметика в int: копейки * (10000 + bps) / (10000 * 100 коп. * 10 руб.).
+    """
+    divisor = 10000 * 100 * 10
+    tens_of_rub = -(-cost_kopecks * (10000 + _SHIPPING_MARGIN_BPS) // divisor)
+    return Decimal(tens_of_rub * 10)
+
+
 def get_international_rate(
     country_from: str,
     country_to: str,
@@ -161,13 +178,8 @@ def calculate_shipping_budget(
         # Международная пересылка
         base_cost_eur = get_international_rate(country_from, country_to, weight_category)
         
-        # Конвертация в рубли с запасом
-        shipping_budget_rub = Decimal(ceil(
-            float(base_cost_eur * EUR_TO_RUB_RATE * (Decimal('1') + SHIPPING_MARGIN))
-        ))
-        
-        # Округляем до 10 рублей
-        shipping_budget_rub = Decimal(ceil(float(shipping_budget_rub) / 10)) * 10
+        # Конвертация в рубли с запасом, округление вверх до 10 рублей
+        shipping_budget_rub = _budget_with_margin(_to_kopecks(base_cost_eur * EUR_TO_RUB_RATE))
         
         logger.info(
             f"INTERNATIONAL_MAIL: {country_from} → {country_to}, "
@@ -180,13 +192,8 @@ def calculate_shipping_budget(
         # Внутренняя пересылка
         base_cost_rub = get_domestic_rate(country_to, weight_category)
         
-        # Применяем запас
-        shipping_budget_rub = Decimal(ceil(
-            float(base_cost_rub * (Decimal('1') + SHIPPING_MARGIN))
-        ))
-        
-        # Округляем до 10 рублей
-        shipping_budget_rub = Decimal(ceil(float(shipping_budget_rub) / 10)) * 10
+        # Применяем запас, округление вверх до 10 рублей
+        shipping_budget_rub = _budget_with_margin(_to_kopecks(base_cost_rub))
         
         logger.info(
             f"DOMESTIC_MAIL: {country_to}, "
@@ -27,23 +27,24 @@ def extract_domain(url: str) -> str:
         'amazon.com'
         >>> extract_domain('https://wildberries.ru/catalog/123/detail.aspx')
         'wildberries.ru'
+    
+    Raises:
+        ValueError: Если url не строка или не содержит схему
     """
-    try:
-        parsed = urlparse(url)
-        domain = parsed.netloc
-        
-        # Убираем www.
-        if domain.startswith('www.'):
-            domain = domain[4:]
-        
-        # Убираем порт если есть
-        if ':' in domain:
-            domain = domain.split(':')[0]
-        
-        return domain.lower()
-    except Exception as e:
-        logger.error(f"Error extracting domain from URL {url}: {e}")
+    if not isinstance(url, str) or '://' not in url:
         raise ValueError(f"Invalid URL format: {url}")
+    
+    domain = urlparse(url).netloc
+    
+    # Убираем www.
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    
+    # Убираем порт если есть
+    if ':' in domain:
+        domain = domain.split(':')[0]
+    
+    return domain.lower()
 
 
 def validate_store_domain(domain: str) -> Tuple[bool, Optional[str], Optional[str]]:
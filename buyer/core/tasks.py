@@ -2,14 +2,32 @@
 Celery tasks for core app.
 """
 
-from celery import shared_task
+from celery import Task, group, shared_task
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Q
+from datetime import timedelta
 from decimal import Decimal
+from itertools import islice
+from typing import List, Tuple
 import logging
 
+import redis
+from redis.exceptions import LockError
+
 from core.models import Deal, OnchainDeal, Payment
-from core.ton_utils import call_contract_method, sync_deal_status_from_chain
+from core.ton_client import TonCenterError
+from core.ton_utils import (
+    call_contract_method,
+    get_contract_state,
+    apply_contract_state,
+    deploy_onchain_deal as deploy_contract,
+    DealOnchainParams,
+    convert_ton_to_nano,
+    calculate_metadata_hash
+)
 from core.payment_webhook import (
     process_yookassa_webhook,
     process_tinkoff_webhook,
@@ -18,176 +36,370 @@ from core.payment_webhook import (
 
 logger = logging.getLogger(__name__)
 
+# Проверяем конфигурацию TON при загрузке модуля, а не при каждом деплое.
+# Без адресов деплой on-chain сделок невозможен (задача вернет ошибку).
+if not (settings.TON_SERVICE_WALLET and settings.TON_ARBITER_WALLET):
+    logger.warning("TON_SERVICE_WALLET/TON_ARBITER_WALLET are not configured, onchain deploys will fail")
+
+# Переходы по тайм-аутам: (статус, поле дедлайна, метод контракта,
+# статус для сделок без on-chain контракта, ключ статистики)
+TIMEOUT_TRANSITIONS = (
+    (Deal.Status.FUNDED, 'purchase_deadline', 'cancel_before_purchase',
+     Deal.Status.CANCELLED_REFUND_CUSTOMER, 'funded_expired'),
+    (Deal.Status.PURCHASED, 'ship_deadline', 'cancel_before_ship',
+     Deal.Status.CANCELLED_REFUND_CUSTOMER, 'purchased_expired'),
+    (Deal.Status.SHIPPED, 'confirm_deadline', 'auto_complete_for_buyer',
+     Deal.Status.COMPLETED, 'shipped_expired'),
+)
+
+# Метод контракта -> (статус сделки, поле дедлайна), при которых он вызывается
+TIMEOUT_ACTIONS = {
+    action: (status, deadline_field)
+    for status, deadline_field, action, _, _ in TIMEOUT_TRANSITIONS
+}
+
+# Сколько сделка считается взятой воркером (OnchainDeal.timeout_claimed_at):
+# отметку воркера, упавшего посреди вызова контракта, можно перехватить
+TIMEOUT_CLAIM_TTL = timedelta(minutes=10)
+
+# Redis-блокировка от наложения запусков check_deal_timeouts
+CHECK_DEAL_TIMEOUTS_LOCK = 'core:check_deal_timeouts:lock'
+CHECK_DEAL_TIMEOUTS_LOCK_EXPIRY = 600  # секунды
+
+# Максимальный размер списка pk__in в одном UPDATE при обработке тайм-аутов.
+# Большие IN-списки в Postgres (JIT) планируются нелинейно долго.
+TIMEOUT_BATCH_SIZE = 500
+
+
+def _fetch_exchange_rate(from_currency: str, to_currency: str) -> dict:
+    """
+    Запрашивает курс валют у источника (без кеша).
+
+    Args:
+        from_currency: Исходная валюта
+        to_currency: Целевая валюта
+
+    Returns:
+        dict: Информация о курсе
+    """
+    # TODO: Реализовать получение реального курса через API
+    # Например, через CoinGecko, Binance API и т.д.
+    
+    logger.info(
+        f"Getting exchange rate: {from_currency} -> {to_currency} "
+        f"at {timezone.now()}"
+    )
+    
+    # Заглушка - возвращаем фиктивный курс
+    # В будущем здесь должен быть реальный API запрос
+    mock_rate = {
+        'BTC': {'USD': 45000.0, 'RUB': 3375000.0},  # Примерный курс
+        'TON': {'USD': 2.5, 'RUB': 187.5},  # Примерный курс TON
+        'RUB': {'USD': 0.011, 'TON': 0.0053},  # Примерный курс RUB
+    }
+    
+    rate = mock_rate.get(from_currency, {}).get(to_currency, 1.0)
+    
+    logger.info(f"Exchange rate {from_currency}/{to_currency}: {rate}")
+    
+    return {
+        'from_currency': from_currency,
+        'to_currency': to_currency,
+        'rate': rate,
+        'timestamp': timezone.now().isoformat(),
+    }
+
 
 @shared_task(name='core.tasks.get_current_exchange_rate')
 def get_current_exchange_rate(from_currency: str = 'BTC', to_currency: str = 'USD') -> dict:
     """
     Получает текущий курс валют.
     
+    Результат кешируется на EXCHANGE_RATE_CACHE_TTL секунд, поэтому повторные
+    вызовы в пределах окна не обращаются к источнику курса.
+    
     Args:
         from_currency: Исходная валюта (по умолчанию BTC)
         to_currency: Целевая валюта (по умолчанию USD)
     
     Returns:
-        dict: Информация о курсе
+        dict: Информация о курсе (timestamp - время получения курса)
     """
     try:
-        # TODO: Реализовать получение реального курса через API
-        # Например, через CoinGecko, Binance API и т.д.
-        
-        logger.info(
-            f"Getting exchange rate: {from_currency} -> {to_currency} "
-            f"at {timezone.now()}"
+        return cache.get_or_set(
+            f"fx:{from_currency}:{to_currency}",
+            lambda: _fetch_exchange_rate(from_currency, to_currency),
+            timeout=getattr(settings, 'EXCHANGE_RATE_CACHE_TTL', 60),
         )
         
-        # Заглушка - возвращаем фиктивный курс
-        # В будущем здесь должен быть реальный API запрос
-        mock_rate = {
-            'BTC': {'USD': 45000.0, 'RUB': 3375000.0},  # Примерный курс
-            'TON': {'USD': 2.5, 'RUB': 187.5},  # Примерный курс TON
-            'RUB': {'USD': 0.011, 'TON': 0.0053},  # Примерный курс RUB
-        }
-        
-        rate = mock_rate.get(from_currency, {}).get(to_currency, 1.0)
-        
-        logger.info(f"Exchange rate {from_currency}/{to_currency}: {rate}")
-        
-        return {
-            'from_currency': from_currency,
-            'to_currency': to_currency,
-            'rate': rate,
-            'timestamp': timezone.now().isoformat(),
-        }
-        
     except Exception as e:
         logger.error(f"Error getting exchange rate: {e}", exc_info=True)
         raise
 
 
+def _split_by_onchain(queryset) -> Tuple[List[int], List[int]]:
+    """
+    Разделяет сделки на имеющие on-chain контракт и не имеющие.
+
+    Выборка идет одним запросом через .iterator(): строки читаются пачками
+    по TIMEOUT_BATCH_SIZE без кеша результатов QuerySet.
+
+    Args:
+        queryset: QuerySet сделок
+
+    Returns:
+        Tuple[List[int], List[int]]: (ID OnchainDeal, ID сделок без контракта)
+    """
+    onchain_ids = []
+    offchain_ids = []
+    rows = queryset.values_list('id', 'onchain_deal__id').iterator(chunk_size=TIMEOUT_BATCH_SIZE)
+    for deal_id, onchain_deal_id in rows:
+        if onchain_deal_id is None:
+            offchain_ids.append(deal_id)
+        else:
+            onchain_ids.append(onchain_deal_id)
+    return onchain_ids, offchain_ids
+
+
+def _bulk_set_status(deal_ids: List[int], status: str, now) -> int:
+    """
+    Обновляет статус сделок без on-chain контракта пачками по TIMEOUT_BATCH_SIZE.
+
+    Args:
+        deal_ids: ID сделок
+        status: Новый статус
+        now: Текущее время (для updated_at, .update() не трогает auto_now)
+
+    Returns:
+        int: Количество обновленных сделок
+    """
+    if not deal_ids:
+        return 0
+
+    updated = 0
+    ids_iter = iter(deal_ids)
+    with transaction.atomic():
+        while True:
+            chunk = list(islice(ids_iter, TIMEOUT_BATCH_SIZE))
+            if not chunk:
+                break
+            updated += Deal.objects.filter(pk__in=chunk).update(status=status, updated_at=now)
+    return updated
+
+
+class OnchainTimeoutTask(Task):
+    """Базовый класс задачи тайм-аута: логирует окончательный сбой после всех повторов."""
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        logger.error(
+            f"Onchain timeout task {task_id} failed after retries "
+            f"(args={args}): {exc}"
+        )
+
+
+@shared_task(
+    name='core.tasks.process_onchain_timeout',
+    base=OnchainTimeoutTask,
+    bind=True,
+    autoretry_for=(TonCenterError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    max_retries=5,
+)
+def process_onchain_timeout(self, onchain_deal_id: int, action: str) -> dict:
+    """
+    Вызывает метод контракта по тайм-ауту сделки и синхронизирует статус.
+
+    При ошибке TonCenter (сеть, 429, 5xx) задача повторяется с экспоненциальной
+    задержкой (до 5 раз, не более 300 секунд между попытками). Отказ самого
+    контракта (ненулевой exit_code) не повторяется: он детерминирован. Задача пропускает
+    сделку, если ее уже взял другой воркер или сделка вышла из статуса
+    тайм-аута (см. _claim_onchain_timeout). Транзакции короткие: строка
+    не блокируется на время запросов к TonCenter.
+
+    Args:
+        onchain_deal_id: ID OnchainDeal
+        action: Метод контракта ('cancel_before_purchase', 'cancel_before_ship',
+            'auto_complete_for_buyer')
+
+    Returns:
+        dict: Результат вызова метода контракта
+
+    Raises:
+        TonCenterError: Если запрос к TonCenter не удался (повторяется Celery)
+    """
+    expected_status, deadline_field = TIMEOUT_ACTIONS[action]
+
+    onchain_deal = _claim_onchain_timeout(onchain_deal_id, expected_status, deadline_field, action)
+    if onchain_deal is None:
+        return {'onchain_deal_id': onchain_deal_id, 'action': action, 'skipped': True}
+
+    # Сетевые вызовы - вне транзакции: строка сделки не блокируется на время HTTP
+    try:
+        logger.info(
+            f"Calling {action} for deal {onchain_deal.deal_id} (timeout, "
+            f"attempt {self.request.retries + 1})"
+        )
+
+        result = call_contract_method(onchain_deal.contract_address, action, {})
+        logger.info(f"Contract method result: {result}")
+
+        # Ошибки TonCenter call_contract_method пробрасывает (их повторяет Celery);
+        # success=False - отказ контракта, повтор дал бы тот же результат
+        if not result.get('success', False):
+            logger.warning(
+                f"Contract method {action} failed for deal {onchain_deal.deal_id}: {result.get('error')}"
+            )
+            return {'deal_id': onchain_deal.deal_id, 'action': action, 'result': result}
+
+        contract_state = get_contract_state(onchain_deal.contract_address)
+
+        # Записываем статус с блокчейна в короткой транзакции
+        with transaction.atomic():
+            onchain_deal = (
+                OnchainDeal.objects
+                .select_related('deal')
+                .select_for_update()
+                .get(pk=onchain_deal_id)
+            )
+            apply_contract_state(onchain_deal, contract_state)
+    finally:
+        # Снимаем отметку и при ошибке: повтор задачи должен снова взять сделку
+        OnchainDeal.objects.filter(pk=onchain_deal_id).update(timeout_claimed_at=None)
+
+    return {
+        'deal_id': onchain_deal.deal_id,
+        'action': action,
+        'result': result,
+    }
+
+
+def _claim_onchain_timeout(onchain_deal_id: int, expected_status: str, deadline_field: str, action: str):
+    """
+    Берет сделку для вызова метода контракта по тайм-ауту.
+
+    В короткой транзакции блокирует строку OnchainDeal, проверяет, что сделка
+    все еще ждет этого тайм-аута и не взята другим воркером, и ставит отметку
+    timeout_claimed_at. Пересекающиеся запуски check_deal_timeouts могли
+    поставить задачу для одной сделки несколько раз - контракт вызовет одна.
+
+    Args:
+        onchain_deal_id: ID OnchainDeal
+        expected_status: Статус сделки, для которого вызывается метод
+        deadline_field: Поле дедлайна этого статуса
+        action: Метод контракта (для логов)
+
+    Returns:
+        OnchainDeal | None: Взятая сделка или None, если ее нужно пропустить
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        onchain_deal = (
+            OnchainDeal.objects
+            .select_related('deal')
+            .select_for_update(skip_locked=True)
+            .filter(pk=onchain_deal_id)
+            .first()
+        )
+        if onchain_deal is None:
+            logger.info(f"OnchainDeal {onchain_deal_id} is locked by another worker, skipping")
+            return None
+
+        claimed_at = onchain_deal.timeout_claimed_at
+        if claimed_at is not None and claimed_at > now - TIMEOUT_CLAIM_TTL:
+            logger.info(f"OnchainDeal {onchain_deal_id} is being processed by another worker, skipping")
+            return None
+
+        deal = onchain_deal.deal
+        deadline = getattr(deal, deadline_field)
+        if deal.status != expected_status or deadline is None or deadline >= now:
+            logger.info(
+                f"Deal {deal.id} is no longer expired in {expected_status} "
+                f"(status={deal.status}), skipping {action}"
+            )
+            return None
+
+        onchain_deal.timeout_claimed_at = now
+        onchain_deal.save(update_fields=['timeout_claimed_at', 'updated_at'])
+
+    return onchain_deal
+
+
 @shared_task(name='core.tasks.check_deal_timeouts')
 def check_deal_timeouts() -> dict:
+    """
+    Периодическая проверка тайм-аутов сделок (см. _process_deal_timeouts).
+
+    Запуски не накладываются друг на друга: задача берет Redis-блокировку
+    и, если предыдущий запуск еще работает, сразу завершается.
+
+    Returns:
+        dict: Статистика обработки тайм-аутов или {'skipped': True}
+    """
+    lock = redis.Redis.from_url(settings.CELERY_BROKER_URL).lock(
+        CHECK_DEAL_TIMEOUTS_LOCK,
+        timeout=CHECK_DEAL_TIMEOUTS_LOCK_EXPIRY
+    )
+    if not lock.acquire(blocking=False):
+        logger.info("check_deal_timeouts is already running, skipping")
+        return {'skipped': True}
+
+    try:
+        return _process_deal_timeouts()
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            # Блокировка истекла раньше завершения - ее мог взять следующий запуск
+            logger.warning("check_deal_timeouts lock expired before release")
+
+
+def _process_deal_timeouts() -> dict:
     """
     Проверяет тайм-ауты сделок и вызывает соответствующие методы контрактов.
 
-    Проверяет:
-    - FUNDED с истекшим purchase_deadline → cancel_before_purchase
-    - PURCHASED с истекшим ship_deadline → cancel_before_ship
-    - SHIPPED с истекшим confirm_deadline → auto_complete_for_buyer
+    Проверяемые переходы описаны в TIMEOUT_TRANSITIONS.
+
+    Вызовы контрактов отправляются параллельно группой задач process_onchain_timeout.
+    Сделки без on-chain контракта обновляются пачками UPDATE (см. TIMEOUT_BATCH_SIZE).
 
     Returns:
-        dict: Статистика обработки тайм-аутов
+        dict: Статистика обработки тайм-аутов (для on-chain сделок - число
+        отправленных задач)
     """
     now = timezone.now()
-    stats = {
-        'funded_expired': 0,
-        'purchased_expired': 0,
-        'shipped_expired': 0,
-        'errors': 0
-    }
+    stats = {stats_key: 0 for *_, stats_key in TIMEOUT_TRANSITIONS}
+    stats['errors'] = 0
+    signatures = []
 
     try:
-        # Обрабатываем сделки FUNDED с истекшим purchase_deadline
-        funded_expired = Deal.objects.filter(
-            status=Deal.Status.FUNDED,
-            purchase_deadline__lt=now
-        ).select_related('onchain_deal')
-
-        for deal in funded_expired:
-            try:
-                if hasattr(deal, 'onchain_deal'):
-                    onchain_deal = deal.onchain_deal
-                    logger.info(f"Cancelling deal {deal.id} before purchase (timeout)")
-                    
-                    # Вызываем метод cancel_before_purchase на контракте
-                    result = call_contract_method(
-                        onchain_deal.contract_address,
-                        'cancel_before_purchase',
-                        {}
-                    )
-                    
-                    logger.info(f"Contract method result: {result}")
-                    
-                    # Синхронизируем статус с блокчейна
-                    sync_deal_status_from_chain(onchain_deal)
-                else:
-                    # Если нет on-chain контракта, просто обновляем статус
-                    logger.warning(f"Deal {deal.id} has no onchain_deal, updating status directly")
-                    deal.status = Deal.Status.CANCELLED_REFUND_CUSTOMER
-                    deal.save()
-                
-                stats['funded_expired'] += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing funded timeout for deal {deal.id}: {e}", exc_info=True)
-                stats['errors'] += 1
-
-        # Обрабатываем сделки PURCHASED с истекшим ship_deadline
-        purchased_expired = Deal.objects.filter(
-            status=Deal.Status.PURCHASED,
-            ship_deadline__lt=now
-        ).select_related('onchain_deal')
-
-        for deal in purchased_expired:
-            try:
-                if hasattr(deal, 'onchain_deal'):
-                    onchain_deal = deal.onchain_deal
-                    logger.info(f"Cancelling deal {deal.id} before ship (timeout)")
-                    
-                    # Вызываем метод cancel_before_ship на контракте
-                    result = call_contract_method(
-                        onchain_deal.contract_address,
-                        'cancel_before_ship',
-                        {}
-                    )
-                    
-                    logger.info(f"Contract method result: {result}")
-                    
-                    # Синхронизируем статус с блокчейна
-                    sync_deal_status_from_chain(onchain_deal)
-                else:
-                    logger.warning(f"Deal {deal.id} has no onchain_deal, updating status directly")
-                    deal.status = Deal.Status.CANCELLED_REFUND_CUSTOMER
-                    deal.save()
-                
-                stats['purchased_expired'] += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing purchased timeout for deal {deal.id}: {e}", exc_info=True)
-                stats['errors'] += 1
-
-        # Обрабатываем сделки SHIPPED с истекшим confirm_deadline
-        shipped_expired = Deal.objects.filter(
-            status=Deal.Status.SHIPPED,
-            confirm_deadline__lt=now
-        ).select_related('onchain_deal')
-
-        for deal in shipped_expired:
-            try:
-                if hasattr(deal, 'onchain_deal'):
-                    onchain_deal = deal.onchain_deal
-                    logger.info(f"Auto-completing deal {deal.id} for buyer (timeout)")
-                    
-                    # Вызываем метод auto_complete_for_buyer на контракте
-                    result = call_contract_method(
-                        onchain_deal.contract_address,
-                        'auto_complete_for_buyer',
-                        {}
-                    )
-                    
-                    logger.info(f"Contract method result: {result}")
-                    
-                    # Синхронизируем статус с блокчейна
-                    sync_deal_status_from_chain(onchain_deal)
-                else:
-                    logger.warning(f"Deal {deal.id} has no onchain_deal, updating status directly")
-                    deal.status = Deal.Status.COMPLETED
-                    deal.save()
-                
-                stats['shipped_expired'] += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing shipped timeout for deal {deal.id}: {e}", exc_info=True)
-                stats['errors'] += 1
+        # Между тиками истекших сделок обычно нет - проверяем одним EXISTS
+        expired_q = Q()
+        for status, deadline_field, _, _, _ in TIMEOUT_TRANSITIONS:
+            expired_q |= Q(status=status, **{f'{deadline_field}__lt': now})
+        if not Deal.objects.filter(expired_q).exists():
+            logger.debug("No expired deals found")
+            return stats
+
+        for status, deadline_field, action, fallback_status, stats_key in TIMEOUT_TRANSITIONS:
+            onchain_ids, offchain_ids = _split_by_onchain(
+                Deal.objects.filter(status=status, **{f'{deadline_field}__lt': now})
+            )
+            signatures.extend(
+                process_onchain_timeout.s(onchain_deal_id, action)
+                for onchain_deal_id in onchain_ids
+            )
+            stats[stats_key] += len(onchain_ids)
+
+            # Если нет on-chain контракта, просто обновляем статус
+            if offchain_ids:
+                logger.warning(f"Deals {offchain_ids} have no onchain_deal, updating status directly")
+            stats[stats_key] += _bulk_set_status(offchain_ids, fallback_status, now)
+
+        # Параллельно вызываем методы контрактов
+        if signatures:
+            group(signatures).apply_async()
+            logger.info(f"Dispatched {len(signatures)} onchain timeout tasks")
 
         logger.info(f"Deal timeout check completed: {stats}")
         return stats
@@ -198,13 +410,13 @@ def check_deal_timeouts() -> dict:
         raise
 
 
-@shared_task(name='core.tasks.process_payment_webhook')
-def process_payment_webhook(provider: str, webhook_data: dict) -> dict:
+def _run_webhook_handler(provider: str, handler, webhook_data: dict) -> dict:
     """
-    Обрабатывает webhook от платежного провайдера.
+    Выполняет обработчик webhook провайдера с логированием ошибок.
 
     Args:
-        provider: Имя провайдера ('yookassa', 'tinkoff', 'mock')
+        provider: Имя провайдера
+        handler: Функция обработки webhook провайдера
         webhook_data: Данные webhook
 
     Returns:
@@ -213,16 +425,7 @@ def process_payment_webhook(provider: str, webhook_data: dict) -> dict:
     logger.info(f"Processing payment webhook from {provider}")
 
     try:
-        if provider == 'yookassa':
-            process_yookassa_webhook(webhook_data)
-        elif provider == 'tinkoff':
-            process_tinkoff_webhook(webhook_data)
-        elif provider == 'mock':
-            process_mock_webhook(webhook_data)
-        else:
-            logger.error(f"Unknown payment provider: {provider}")
-            return {'error': f'Unknown provider: {provider}'}
-
+        handler(webhook_data)
         return {'status': 'processed', 'provider': provider}
 
     except Exception as e:
@@ -230,6 +433,109 @@ def process_payment_webhook(provider: str, webhook_data: dict) -> dict:
         raise
 
 
+@shared_task(name='core.tasks.process_yookassa_webhook', queue='webhooks')
+def process_yookassa_webhook_task(webhook_data: dict) -> dict:
+    """Обрабатывает webhook от YooKassa."""
+    return _run_webhook_handler('yookassa', process_yookassa_webhook, webhook_data)
+
+
+@shared_task(name='core.tasks.process_tinkoff_webhook', queue='webhooks')
+def process_tinkoff_webhook_task(webhook_data: dict) -> dict:
+    """Обрабатывает webhook от Tinkoff."""
+    return _run_webhook_handler('tinkoff', process_tinkoff_webhook, webhook_data)
+
+
+@shared_task(name='core.tasks.process_mock_webhook', queue='webhooks')
+def process_mock_webhook_task(webhook_data: dict) -> dict:
+    """Обрабатывает тестовый webhook (mock)."""
+    return _run_webhook_handler('mock', process_mock_webhook, webhook_data)
+
+
+# Провайдер -> задача обработки webhook (view ставит ее в очередь напрямую)
+WEBHOOK_TASKS = {
+    'yookassa': process_yookassa_webhook_task,
+    'tinkoff': process_tinkoff_webhook_task,
+    'mock': process_mock_webhook_task,
+}
+
+
+@shared_task(name='core.tasks.process_payment_webhook')
+def process_payment_webhook(provider: str, webhook_data: dict) -> dict:
+    """
+    Обрабатывает webhook от платежного провайдера.
+
+    Оставлена для сообщений, уже поставленных в очередь; новые webhook
+    view отправляет сразу в задачу провайдера из WEBHOOK_TASKS.
+
+    Args:
+        provider: Имя провайдера ('yookassa', 'tinkoff', 'mock')
+        webhook_data: Данные webhook
+
+    Returns:
+        dict: Результат обработки
+    """
+    handlers = {
+        'yookassa': process_yookassa_webhook,
+        'tinkoff': process_tinkoff_webhook,
+        'mock': process_mock_webhook,
+    }
+    handler = handlers.get(provider)
+    if handler is None:
+        logger.error(f"Unknown payment provider: {provider}")
+        return {'error': f'Unknown provider: {provider}'}
+
+    return _run_webhook_handler(provider, handler, webhook_data)
+
+
+def _build_onchain_params(
+    deal: Deal,
+    customer_address: str,
+    buyer_address: str,
+    service_wallet: str,
+    arbiter_wallet: str
+) -> DealOnchainParams:
+    """
+    Собирает параметры on-chain контракта из полей сделки.
+
+    Только локальные вычисления (хеш метаданных, перевод сумм в nano, дедлайны
+    в unix-время) - без обращений к БД и сети.
+
+    Args:
+        deal: Сделка
+        customer_address: TON-адрес заказчика
+        buyer_address: TON-адрес байера
+        service_wallet: Адрес кошелька сервиса
+        arbiter_wallet: Адрес кошелька арбитра
+
+    Returns:
+        DealOnchainParams: Параметры для деплоя контракта
+    """
+    metadata_hash = calculate_metadata_hash({
+        'deal_id': deal.id,
+        'order_title': deal.order.title,
+        'created_at': deal.created_at.isoformat(),
+    })
+
+    # shipping_budget_ton должен быть заполнен при создании Deal
+    shipping_budget_ton = deal.shipping_budget_ton or Decimal('0')
+
+    return DealOnchainParams(
+        customer_address=customer_address,
+        buyer_address=buyer_address,
+        service_wallet=service_wallet,
+        arbiter_wallet=arbiter_wallet,
+        item_price_nano=convert_ton_to_nano(deal.item_price_ton),
+        buyer_fee_nano=convert_ton_to_nano(deal.buyer_fee_ton),
+        shipping_budget_nano=convert_ton_to_nano(shipping_budget_ton),
+        service_fee_nano=convert_ton_to_nano(deal.service_fee_ton),
+        insurance_nano=convert_ton_to_nano(deal.insurance_ton),
+        purchase_deadline_ts=int(deal.purchase_deadline.timestamp()),
+        ship_deadline_ts=int(deal.ship_deadline.timestamp()),
+        confirm_deadline_ts=int(deal.confirm_deadline.timestamp()),
+        metadata_hash_cell=metadata_hash
+    )
+
+
 @shared_task(name='core.tasks.deploy_onchain_deal')
 def deploy_onchain_deal(deal_id: int) -> dict:
     """
@@ -241,17 +547,14 @@ def deploy_onchain_deal(deal_id: int) -> dict:
     Returns:
         dict: Результат деплоя
     """
-    from core.models import Deal, OnchainDeal
-    from core.ton_utils import (
-        deploy_onchain_deal as deploy_contract,
-        DealOnchainParams,
-        convert_ton_to_nano,
-        calculate_metadata_hash
-    )
-    import os
-
     try:
-        deal = Deal.objects.get(pk=deal_id)
+        # Подтягиваем все связанные объекты одним JOIN (buyer, профиль заказчика, заявка, контракт)
+        deal = Deal.objects.select_related(
+            'buyer',
+            'customer__buyer_profile',
+            'order',
+            'onchain_deal',
+        ).get(pk=deal_id)
         
         # Проверяем, что on-chain контракт еще не создан
         if hasattr(deal, 'onchain_deal'):
@@ -259,15 +562,17 @@ def deploy_onchain_deal(deal_id: int) -> dict:
             return {'error': 'Onchain deal already exists'}
 
         # Получаем адреса из настроек
-        service_wallet = os.environ.get('TON_SERVICE_WALLET', '')
-        arbiter_wallet = os.environ.get('TON_ARBITER_WALLET', '')
+        service_wallet = settings.TON_SERVICE_WALLET
+        arbiter_wallet = settings.TON_ARBITER_WALLET
         
         # Получаем адрес байера (обязателен)
         buyer_ton_address = deal.buyer.ton_address or ''
         
         # Получаем адрес заказчика (если есть, иначе используем service_wallet)
-        if hasattr(deal.customer, 'buyer_profile') and deal.customer.buyer_profile.ton_address:
-            customer_ton_address = deal.customer.buyer_profile.ton_address
+        # buyer_profile уже загружен через select_related, getattr не делает запрос
+        customer_profile = getattr(deal.customer, 'buyer_profile', None)
+        if customer_profile is not None and customer_profile.ton_address:
+            customer_ton_address = customer_profile.ton_address
         else:
             # Если у заказчика нет TON-адреса, используем service_wallet
             customer_ton_address = service_wallet
@@ -277,32 +582,14 @@ def deploy_onchain_deal(deal_id: int) -> dict:
             logger.error(f"Missing required TON addresses for deal {deal_id}")
             return {'error': 'Missing required TON addresses: service_wallet, arbiter_wallet, buyer_ton_address'}
 
-        # Подготавливаем параметры
-        deal_data = {
-            'deal_id': deal.id,
-            'order_title': deal.order.title,
-            'created_at': deal.created_at.isoformat(),
-        }
-        metadata_hash = calculate_metadata_hash(deal_data)
-
-        # Получаем shipping_budget_ton (должен быть заполнен при создании Deal)
-        shipping_budget_ton = deal.shipping_budget_ton or Decimal('0')
-        
-        params = DealOnchainParams(
+        params = _build_onchain_params(
+            deal,
             customer_address=customer_ton_address,
             buyer_address=buyer_ton_address,
             service_wallet=service_wallet,
-            arbiter_wallet=arbiter_wallet,
-            item_price_nano=convert_ton_to_nano(deal.item_price_ton),
-            buyer_fee_nano=convert_ton_to_nano(deal.buyer_fee_ton),
-            shipping_budget_nano=convert_ton_to_nano(shipping_budget_ton),
-            service_fee_nano=convert_ton_to_nano(deal.service_fee_ton),
-            insurance_nano=convert_ton_to_nano(deal.insurance_ton),
-            purchase_deadline_ts=int(deal.purchase_deadline.timestamp()),
-            ship_deadline_ts=int(deal.ship_deadline.timestamp()),
-            confirm_deadline_ts=int(deal.confirm_deadline.timestamp()),
-            metadata_hash_cell=metadata_hash
+            arbiter_wallet=arbiter_wallet
         )
+        metadata_hash = params.metadata_hash_cell
 
         # Деплоим контракт
         contract_address = deploy_contract(params)
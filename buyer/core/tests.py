@@ -1,4 +1,162 @@
-from django.test import TestCase
+from base64 import b64decode
+from decimal import Decimal, ROUND_CEILING
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.test import SimpleTestCase
 
+from core import shipping_calculator
+from core.ton_deploy_tonutils import TONSDK_AVAILABLE
+
+if TONSDK_AVAILABLE:
+    from nacl.bindings import crypto_sign_seed_keypair
+    from nacl.signing import VerifyKey
+    from tonsdk.boc import Cell, begin_cell
+    from tonsdk.contract.wallet import WalletV3ContractR2
+
+    from core.ton_contracts import build_state_init, state_init_and_address
+    from core.ton_deploy_tonutils import DEPLOY_SEND_MODE, build_deploy_boc
+
+
+class BudgetWithMarginTests(SimpleTestCase):
+    """Целочисленный расчет бюджета доставки с запасом (_budget_with_margin)."""
+
+    @staticmethod
+    def reference_budget(cost_kopecks, margin):
+        """Тот же расчет в Decimal: рубли * (1 + запас), вверх до 10 рублей."""
+        tens = (Decimal(cost_kopecks) / 100 * (1 + margin) / 10).to_integral_value(rounding=ROUND_CEILING)
+        return tens * 10
+
+    def test_rounds_up_to_ten_rubles(self):
+        with mock.patch.object(shipping_calculator, '_SHIPPING_MARGIN_BPS', 1000):
+            cases = {
+                0: Decimal(0),
+                100000: Decimal(1100),      # 1000 руб. * 1.1 = 1100 ровно
+                100001: Decimal(1110),      # 1100.011 -> 1110
+                90909: Decimal(1000),       # 999.999 -> 1000
+                150000: Decimal(1650),      # 15 EUR * 100 * 1.1
+            }
+            for cost_kopecks, expected in cases.items():
+                with self.subTest(cost_kopecks=cost_kopecks):
+                    self.assertEqual(shipping_calculator._budget_with_margin(cost_kopecks), expected)
+
+    def test_matches_decimal_calculation(self):
+        margin = shipping_calculator.SHIPPING_MARGIN
+        for cost_kopecks in list(range(0, 20000, 7)) + [1500000, 9999999, 10000001]:
+            with self.subTest(cost_kopecks=cost_kopecks):
+                self.assertEqual(
+                    shipping_calculator._budget_with_margin(cost_kopecks),
+                    self.reference_budget(cost_kopecks, margin),
+                )
+
+
+@skipUnless(TONSDK_AVAILABLE, "tonsdk не установлен")
+class BuildStateInitTests(SimpleTestCase):
+    """build_state_init против побитовой сборки через begin_cell."""
+
+    @staticmethod
+    def reference_state_init(code_cell, init_data_cell):
+        return (
+            begin_cell()
+            .store_bit(0)  # split_depth = None
+            .store_bit(0)  # special = None
+            .store_bit(1)  # code = Some
+            .store_ref(code_cell)
+            .store_bit(1)  # data = Some
+            .store_ref(init_data_cell)
+            .store_bit(0)  # library = None
+            .end_cell()
+        )
+
+    def test_matches_begin_cell_chain(self):
+        nested = begin_cell().store_uint(42, 16).end_cell()
+        cases = [
+            (begin_cell().end_cell(), begin_cell().end_cell()),
+            (begin_cell().store_uint(7, 8).end_cell(), begin_cell().store_uint(9, 64).end_cell()),
+            (
+                begin_cell().store_bytes(bytes(range(100))).store_ref(nested).end_cell(),
+                begin_cell().store_uint(1, 1).store_ref(nested).store_ref(nested).end_cell(),
+            ),
+        ]
+        for code_cell, init_data_cell in cases:
+            with self.subTest(code_bits=code_cell.bits.cursor, data_refs=len(init_data_cell.refs)):
+                state_init = build_state_init(code_cell, init_data_cell)
+                expected = self.reference_state_init(code_cell, init_data_cell)
+                self.assertEqual(state_init.bytes_hash(), expected.bytes_hash())
+                self.assertEqual(state_init.to_boc(False), expected.to_boc(False))
+                self.assertEqual(
+                    state_init.to_boc(has_idx=False, hash_crc32=False),
+                    expected.to_boc(has_idx=False, hash_crc32=False),
+                )
+
+
+@skipUnless(TONSDK_AVAILABLE, "tonsdk и pynacl не установлены")
+class BuildDeployBocTests(SimpleTestCase):
+    """Разбор BOC деплоя из build_deploy_boc по схеме TL-B сообщений."""
+
+    def setUp(self):
+        self.public_key, private_key = crypto_sign_seed_keypair(bytes(range(32)))
+        self.wallet = WalletV3ContractR2(public_key=self.public_key, private_key=private_key, wc=0)
+        self.code_cell = begin_cell().store_uint(7, 8).end_cell()
+        self.data_cell = begin_cell().store_uint(9, 64).end_cell()
+        self.state_init, self.contract_address = state_init_and_address(self.code_cell, self.data_cell)
+
+    def test_external_message_is_valid_and_signed(self):
+        seqno = 5
+        boc_b64 = build_deploy_boc(
+            self.state_init, self.contract_address, Decimal("1.5"), self.wallet, seqno
+        )
+        message = Cell.one_from_boc(b64decode(boc_b64)).begin_parse()
+
+        # ext_in_msg_info$10 src:addr_none dest:кошелек import_fee:0
+        self.assertEqual(message.read_uint(2), 0b10)
+        self.assertEqual(message.read_uint(2), 0b00)
+        self.assertEqual(message.read_msg_addr().to_string(), self.wallet.address.to_string())
+        self.assertEqual(message.read_coins(), 0)
+        # init: nothing (кошелек уже развернут), body: в той же ячейке
+        self.assertEqual(message.read_bit(), 0)
+        self.assertEqual(message.read_bit(), 0)
+
+        signature = message.read_bytes(64)
+        subwallet_id = message.read_uint(32)
+        valid_until = message.read_uint(32)
+        self.assertEqual(message.read_uint(32), seqno)
+        self.assertEqual(message.read_uint(8), DEPLOY_SEND_MODE)
+        internal_message = message.read_ref()
+
+        # Подпись кошелька - над representation hash signing message
+        signing_message = (
+            begin_cell()
+            .store_uint(subwallet_id, 32)
+            .store_uint(valid_until, 32)
+            .store_uint(seqno, 32)
+            .store_uint(DEPLOY_SEND_MODE, 8)
+            .store_ref(internal_message)
+            .end_cell()
+        )
+        VerifyKey(self.public_key).verify(bytes(signing_message.bytes_hash()), signature)
+
+        # int_msg_info$0 ihr_disabled bounce bounced src:addr_none dest value
+        internal = internal_message.begin_parse()
+        self.assertEqual(internal.read_uint(4), 0b0110)
+        self.assertEqual(internal.read_uint(2), 0b00)
+        # Адрес контракта - hash его state_init в workchain 0
+        self.assertEqual(internal.read_msg_addr().to_string(), "0:" + bytes(self.state_init.bytes_hash()).hex())
+        self.assertEqual(internal.read_coins(), 1500000000)
+        # extra_currencies, ihr_fee, fwd_fee, created_lt, created_at
+        self.assertEqual(internal.read_bit(), 0)
+        self.assertEqual(internal.read_coins(), 0)
+        self.assertEqual(internal.read_coins(), 0)
+        self.assertEqual(internal.read_uint(64), 0)
+        self.assertEqual(internal.read_uint(32), 0)
+
+        # init: just, state_init в той же ячейке (code и data - ссылки) или ссылкой
+        self.assertEqual(internal.read_bit(), 1)
+        if internal.read_bit():
+            self.assertEqual(internal.read_ref().bytes_hash(), self.state_init.bytes_hash())
+        else:
+            self.assertEqual(internal.read_uint(5), 0b00110)
+            self.assertEqual(internal.read_ref().bytes_hash(), self.code_cell.bytes_hash())
+            self.assertEqual(internal.read_ref().bytes_hash(), self.data_cell.bytes_hash())
+        # body: пустое тело в той же ячейке
+        self.assertEqual(internal.read_bit(), 0)
+        self.assertTrue(internal.is_empty())
@@ -4,8 +4,14 @@ HTTP клиент для работы с TonCenter API.
 Тонкий слой-обёртка для отправки запросов к TonCenter HTTP API.
 """
 
+import asyncio
+import atexit
+import copy
+import json
 import os
-from typing import Dict, Any, Optional
+import random
+import threading
+from typing import Dict, Any, List, Optional
 import logging
 
 try:
@@ -13,14 +19,160 @@ try:
 except ImportError:
     httpx = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from cachetools import LRUCache, TTLCache
+except ImportError:
+    LRUCache = None
+    TTLCache = None
+
+try:
+    from tonsdk.boc import Cell
+    from tonsdk.utils import b64str_to_bytes
+except ImportError:
+    Cell = None
+    b64str_to_bytes = None
+
 logger = logging.getLogger(__name__)
 
+# Длины data-ячейки стандартных кошельков, у которых seqno - первые 32 бита:
+# v2 (seqno + pubkey), v3 (seqno + subwallet + pubkey), v4 (v3 + бит словаря плагинов)
+_SEQNO_FIRST_WALLET_DATA_BITS = frozenset({32 + 256, 32 + 32 + 256, 32 + 32 + 256 + 1})
+
 
 class TonCenterError(Exception):
     """Исключение для ошибок TonCenter API."""
     pass
 
 
+def _json_dumps(data: Dict[str, Any]) -> bytes:
+    """Сериализует тело запроса в JSON bytes (orjson, если установлен)."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode("utf-8")
+
+
+def _params_key(params: Dict[str, Any]) -> bytes:
+    """Канонический ключ параметров запроса для кешей (orjson, если установлен)."""
+    if orjson is not None:
+        return orjson.dumps(params, option=orjson.OPT_SORT_KEYS, default=str)
+    return json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+
+
+def _json_loads(content: bytes) -> Any:
+    """Разбирает JSON ответа напрямую из bytes (orjson, если установлен)."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+# Read-only методы, ответы которых кешируются на короткое время.
+# Состояние в TON меняется не чаще раза в блок (~5с), поэтому TTL 3с безопасен.
+CACHEABLE_METHODS = frozenset({"getAddressInformation", "runGetMethod"})
+_RESPONSE_CACHE = TTLCache(maxsize=4096, ttl=3) if TTLCache is not None else None
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+# ETag последних ответов GET-методов: (url, params) -> (etag, result).
+# runGetMethod зависит от блока, sendBoc - POST, для них ETag не используется.
+ETAG_EXCLUDED_METHODS = frozenset({"sendBoc", "runGetMethod"})
+_ETAG_CACHE = LRUCache(maxsize=1024) if LRUCache is not None else None
+
+def invalidate_cache() -> None:
+    """
+    Сбрасывает кеш ответов TonCenter.
+    
+    Вызывается после sendBoc, чтобы следующий seqno/состояние адреса
+    читались из сети, а не из кеша.
+    """
+    if _RESPONSE_CACHE is not None:
+        with _RESPONSE_CACHE_LOCK:
+            _RESPONSE_CACHE.clear()
+
+
+# Общий HTTP клиент (пул соединений + HTTP/2), переиспользуется всеми TonCenterClient
+_DEFAULT_CLIENT = None
+
+# Создание общих клиентов (get_default_client, get_client) из нескольких потоков.
+# RLock: get_client создает TonCenterClient, который берет get_default_client
+_SHARED_CLIENTS_LOCK = threading.RLock()
+
+# Размер пула соединений к TonCenter (настраивается через окружение)
+TONCENTER_MAX_CONNECTIONS = int(os.getenv("TONCENTER_MAX_CONNECTIONS", 100))
+TONCENTER_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("TONCENTER_MAX_KEEPALIVE_CONNECTIONS", 20))
+TONCENTER_KEEPALIVE_EXPIRY = 30.0  # секунды
+
+
+def _pool_limits() -> "httpx.Limits":
+    """Лимиты пула соединений для sync и async клиентов TonCenter."""
+    return httpx.Limits(
+        max_connections=TONCENTER_MAX_CONNECTIONS,
+        max_keepalive_connections=TONCENTER_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=TONCENTER_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_default_client() -> "httpx.Client":
+    """
+    Возвращает общий httpx.Client для запросов к TonCenter.
+    
+    Клиент создается один раз на процесс: keep-alive соединения и HTTP/2
+    избавляют от TCP+TLS рукопожатия на каждый запрос.
+    
+    Returns:
+        httpx.Client: Общий HTTP клиент
+    """
+    global _DEFAULT_CLIENT
+    if _DEFAULT_CLIENT is None:
+        with _SHARED_CLIENTS_LOCK:
+            if _DEFAULT_CLIENT is None:
+                _DEFAULT_CLIENT = httpx.Client(
+                    http2=True,
+                    limits=_pool_limits(),
+                    timeout=httpx.Timeout(30.0, connect=5.0),
+                )
+                atexit.register(_close_default_client)
+    return _DEFAULT_CLIENT
+
+
+def _close_default_client() -> None:
+    """Закрывает общий HTTP клиент при завершении процесса."""
+    global _DEFAULT_CLIENT
+    if _DEFAULT_CLIENT is not None:
+        _DEFAULT_CLIENT.close()
+        _DEFAULT_CLIENT = None
+
+
+def _backoff_delay(retry_delay: float, attempt: int, response: Optional["httpx.Response"] = None) -> float:
+    """
+    Вычисляет паузу перед повтором запроса.
+    
+    Экспоненциальная задержка (или Retry-After из ответа сервера) умножается
+    на случайный коэффициент 0.5-1.5, чтобы воркеры, одновременно получившие
+    429, не повторяли запросы синхронно.
+    
+    Args:
+        retry_delay: Базовая задержка в секундах
+        attempt: Номер попытки (с 0)
+        response: HTTP ответ (для заголовка Retry-After)
+        
+    Returns:
+        float: Пауза в секундах
+    """
+    wait_time = retry_delay * (2 ** attempt)
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            wait_time = float(retry_after)
+        except ValueError:
+            # Retry-After в формате HTTP-date не поддерживаем
+            pass
+    return wait_time * random.uniform(0.5, 1.5)
+
+
 class TonCenterClient:
     """
     HTTP клиент для TonCenter API v2.
@@ -31,7 +183,8 @@ class TonCenterClient:
     def __init__(
         self,
         api_key: Optional[str] = None,
-        base_url: Optional[str] = None
+        base_url: Optional[str] = None,
+        client: Optional["httpx.Client"] = None
     ):
         """
         Инициализирует клиент TonCenter.
@@ -39,6 +192,7 @@ class TonCenterClient:
         Args:
             api_key: API ключ для TonCenter (опционально, берется из TONCENTER_API_KEY)
             base_url: Базовый URL TonCenter (по умолчанию https://toncenter.com/api/v2)
+            client: HTTP клиент (по умолчанию общий, см. get_default_client)
         """
         if httpx is None:
             raise ImportError(
@@ -55,11 +209,17 @@ class TonCenterClient:
         # Убираем trailing slash если есть
         self.base_url = self.base_url.rstrip('/')
         
-        self._client = httpx.Client(timeout=30.0)
+        self._client = client or get_default_client()
         
         logger.info(f"TonCenterClient initialized: base_url={self.base_url}")
     
-    def _request(self, method: str, params: Optional[Dict[str, Any]] = None, retry_on_rate_limit: bool = True) -> Dict[str, Any]:
+    def _request(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        retry_on_rate_limit: bool = True,
+        cache: bool = True
+    ) -> Dict[str, Any]:
         """
         Выполняет HTTP запрос к TonCenter API.
         
@@ -67,6 +227,7 @@ class TonCenterClient:
             method: Имя метода API (например, 'sendBoc', 'getAddressInformation')
             params: Параметры запроса
             retry_on_rate_limit: Повторять запрос при rate limit (429) с задержкой
+            cache: Использовать кеш ответов и условные GET (If-None-Match)
             
         Returns:
             dict: Результат запроса из поля 'result'
@@ -80,13 +241,34 @@ class TonCenterClient:
         if params is None:
             params = {}
         
+        url = f"{self.base_url}/{method}"
+        params_key = _params_key(params) if cache else None
+        
+        # Короткий TTL-кеш для read-only методов (sendBoc и др. не кешируются)
+        cache_key = None
+        if cache and _RESPONSE_CACHE is not None and method in CACHEABLE_METHODS:
+            cache_key = (self.base_url, method, params_key)
+            with _RESPONSE_CACHE_LOCK:
+                cached = _RESPONSE_CACHE.get(cache_key)
+            if cached is not None:
+                logger.debug(f"TonCenter cache hit: {method}")
+                # Копия: вызывающий код не должен менять закешированный ответ
+                return copy.deepcopy(cached)
+        
         # Добавляем API ключ если он есть
         if self.api_key:
             params["api_key"] = self.api_key
         
-        url = f"{self.base_url}/{method}"
+        # Условный GET: при 304 тело не передается и не разбирается
+        etag_key = None
+        etag_entry = None
+        if cache and _ETAG_CACHE is not None and method not in ETAG_EXCLUDED_METHODS:
+            etag_key = (url, params_key)
+            with _RESPONSE_CACHE_LOCK:
+                etag_entry = _ETAG_CACHE.get(etag_key)
+        
         max_retries = 3 if retry_on_rate_limit else 0
-        retry_delay = 2  # секунды
+        retry_delay = 0.25  # секунды, базовая задержка (с джиттером)
         
         for attempt in range(max_retries + 1):
             try:
@@ -98,25 +280,30 @@ class TonCenterClient:
                     # TonCenter API v2 требует POST с JSON body для sendBoc
                     response = self._client.post(
                         url,
-                        json=params,
+                        content=_json_dumps(params),
                         headers={"Content-Type": "application/json"}
                     )
                 else:
-                    response = self._client.get(url, params=params)
+                    headers = {"If-None-Match": etag_entry[0]} if etag_entry else None
+                    response = self._client.get(url, params=params, headers=headers)
+                    
+                    if response.status_code == 304 and etag_entry:
+                        logger.debug(f"TonCenter response not modified: {method}")
+                        return copy.deepcopy(etag_entry[1])
                 
                 # Проверяем rate limit (429) перед raise_for_status
                 if response.status_code == 429 and attempt < max_retries:
-                    wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
+                    wait_time = _backoff_delay(retry_delay, attempt, response)
                     logger.warning(
                         f"Rate limit exceeded (429) for {method}. "
-                        f"Waiting {wait_time}s before retry {attempt + 1}/{max_retries}..."
+                        f"Waiting {wait_time:.2f}s before retry {attempt + 1}/{max_retries}..."
                     )
                     time.sleep(wait_time)
                     continue
                 
                 response.raise_for_status()
                 
-                data = response.json()
+                data = _json_loads(response.content)
                 
                 if not data.get("ok", False):
                     error_msg = data.get("error", "Unknown error")
@@ -126,15 +313,26 @@ class TonCenterClient:
                 result = data.get("result", {})
                 logger.debug(f"TonCenter response: {method} -> success")
                 
+                if cache_key is not None:
+                    with _RESPONSE_CACHE_LOCK:
+                        _RESPONSE_CACHE[cache_key] = result
+                
+                etag = response.headers.get("ETag") if etag_key is not None else None
+                if etag:
+                    with _RESPONSE_CACHE_LOCK:
+                        _ETAG_CACHE[etag_key] = (etag, result)
+                
+                if cache_key is not None or etag:
+                    return copy.deepcopy(result)
                 return result
                 
             except httpx.HTTPStatusError as e:
                 # Обрабатываем ошибки HTTP статусов
                 if e.response.status_code == 429 and attempt < max_retries:
-                    wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
+                    wait_time = _backoff_delay(retry_delay, attempt, e.response)
                     logger.warning(
                         f"Rate limit exceeded (429) for {method}. "
-                        f"Waiting {wait_time}s before retry {attempt + 1}/{max_retries}..."
+                        f"Waiting {wait_time:.2f}s before retry {attempt + 1}/{max_retries}..."
                     )
                     time.sleep(wait_time)
                     continue  # Повторяем попытку
@@ -143,7 +341,7 @@ class TonCenterClient:
                 error_detail = None
                 if e.response is not None:
                     try:
-                        error_detail = e.response.json()
+                        error_detail = _json_loads(e.response.content)
                         logger.error(f"HTTP error calling TonCenter {method}: {e}")
                         logger.error(f"Response status: {e.response.status_code}")
                         logger.error(f"Response body: {error_detail}")
@@ -168,10 +366,10 @@ class TonCenterClient:
             except Exception as e:
                 # Если это не последняя попытка, продолжаем цикл
                 if attempt < max_retries:
-                    wait_time = retry_delay * (2 ** attempt)
+                    wait_time = _backoff_delay(retry_delay, attempt)
                     logger.warning(
                         f"Unexpected error for {method}: {e}. "
-                        f"Retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})..."
+                        f"Retrying in {wait_time:.2f}s (attempt {attempt + 1}/{max_retries})..."
                     )
                     time.sleep(wait_time)
                     continue
@@ -193,26 +391,31 @@ class TonCenterClient:
             >>> result = client.send_boc("te6cckEBAQEA...")
         """
         logger.info("Sending BOC to TON network")
-        return self._request("sendBoc", {"boc": boc_base64})
+        result = self._request("sendBoc", {"boc": boc_base64})
+        # Транзакция меняет seqno и состояние адресов - кешированные ответы устарели
+        invalidate_cache()
+        return result
     
-    def get_address_information(self, address: str) -> Dict[str, Any]:
+    def get_address_information(self, address: str, cache: bool = True) -> Dict[str, Any]:
         """
         Получает информацию об адресе в TON.
         
         Args:
             address: TON адрес (можно в любом формате)
+            cache: Разрешить ответ из короткого кеша (False - всегда из сети)
             
         Returns:
             dict: Информация об адресе (balance, state, etc.)
         """
         logger.debug(f"Getting address information: {address}")
-        return self._request("getAddressInformation", {"address": address})
+        return self._request("getAddressInformation", {"address": address}, cache=cache)
     
     def run_get_method(
         self,
         address: str,
         method: str,
-        stack: Optional[list] = None
+        stack: Optional[list] = None,
+        cache: bool = True
     ) -> Dict[str, Any]:
         """
         Выполняет GET-метод смарт-контракта.
@@ -221,6 +424,7 @@ class TonCenterClient:
             address: Адрес контракта
             method: Имя метода для вызова
             stack: Стек параметров (опционально)
+            cache: Разрешить ответ из короткого кеша (False - всегда из сети)
             
         Returns:
             dict: Результат выполнения метода
@@ -230,7 +434,7 @@ class TonCenterClient:
             params["stack"] = stack
         
         logger.debug(f"Running get method {method} on {address}")
-        return self._request("runGetMethod", params)
+        return self._request("runGetMethod", params, cache=cache)
     
     def get_transactions(self, address: str, limit: int = 10) -> list:
         """
@@ -249,94 +453,70 @@ class TonCenterClient:
             "limit": limit
         })
     
-    def get_wallet_seqno(self, address: str) -> int:
+    @staticmethod
+    def _seqno_from_wallet_data(data_b64: Optional[str]) -> Optional[int]:
         """
-        Получает текущий seqno кошелька.
+        Читает seqno из data-ячейки стандартного кошелька (v2/v3/v4).
+        
+        Args:
+            data_b64: Поле data из getAddressInformation (BOC в base64)
+            
+        Returns:
+            int | None: seqno или None, если формат data неизвестен
+        """
+        if not data_b64 or Cell is None:
+            return None
+        
+        try:
+            data_cell = Cell.one_from_boc(b64str_to_bytes(data_b64))
+        except Exception:
+            return None
+        
+        if data_cell.bits.cursor not in _SEQNO_FIRST_WALLET_DATA_BITS:
+            return None
+        
+        return data_cell.begin_parse().read_uint(32)
+    
+    @staticmethod
+    def _parse_seqno_stack(stack: list) -> Optional[int]:
+        """
+        Разбирает seqno из стека runGetMethod нестандартного формата.
+        
+        Используется, только если ответ не совпал с форматом [["num", "0x..."]].
+        Поддерживает ["num", "123"], {"type": "num", "value": "0x..."} и голое число.
+        
+        Returns:
+            int | None: seqno или None, если стек пуст
+        """
+        if not stack:
+            return None
+        
+        seqno_value = stack[0]
+        if isinstance(seqno_value, list) and len(seqno_value) >= 2:
+            seqno_str = str(seqno_value[1])
+            return int(seqno_str, 16) if seqno_str.startswith("0x") else int(seqno_str)
+        if isinstance(seqno_value, dict):
+            return int(seqno_value.get("value", 0))
+        return int(seqno_value)
+    
+    def get_wallet_state_bundle(self, address: str) -> Dict[str, Any]:
+        """
+        Получает seqno, статус и баланс кошелька одним getAddressInformation.
+        
+        Для стандартных кошельков seqno читается из data аккаунта; runGetMethod
+        вызывается только для нестандартного формата data. Кеш ответов
+        не используется: по seqno подписываются и отправляются сообщения.
         
         Args:
             address: Адрес кошелька
             
         Returns:
-            int: Текущий seqno кошелька (или 0 если кошелек не инициализирован)
+            dict: {'seqno': int, 'state': str, 'balance': str}; seqno = 0, если
+            кошелек не инициализирован или seqno получить не удалось
         """
         try:
             # Пробуем получить информацию об адресе для проверки статуса
-            addr_info = self.get_address_information(address)
-            account_state = addr_info.get("state", "")
-            
-            # Если адрес uninitialized или не существует, возвращаем 0
-            if account_state in ("uninit", ""):
-                logger.debug(f"Wallet {address} is uninitialized, using seqno=0")
-                return 0
-            
-            # Пробуем получить seqno через runGetMethod
-            try:
-                result = self.run_get_method(address, "seqno")
-                # Парсим результат get method (обычно это список в формате TonCenter)
-                stack = result.get("stack", [])
-                if stack and len(stack) > 0:
-                    # Первый элемент стека - это seqno
-                    seqno_value = stack[0]
-                    if isinstance(seqno_value, (list, dict)):
-                        # TonCenter возвращает числа в специальном формате
-                        # Формат: ["num", "0x..."] или {"type": "num", "value": "0x..."}
-                        if isinstance(seqno_value, list) and len(seqno_value) >= 2:
-                            # Извлекаем значение (может быть в hex или decimal)
-                            seqno_str = str(seqno_value[1])
-                            if seqno_str.startswith("0x"):
-                                seqno = int(seqno_str, 16)
-                            else:
-                                seqno = int(seqno_str)
-                            logger.debug(f"Got seqno={seqno} for wallet {address}")
-                            return seqno
-                        elif isinstance(seqno_value, dict):
-                            seqno = int(seqno_value.get("value", 0))
-                            logger.debug(f"Got seqno={seqno} for wallet {address}")
-                            return seqno
-                    seqno = int(seqno_value)
-                    logger.debug(f"Got seqno={seqno} for wallet {address}")
-                    return seqno
-            except Exception as get_method_error:
-                # Если runGetMethod не работает, пробуем получить seqno из последних транзакций
-                logger.debug(f"runGetMethod failed for {address}, trying getTransactions: {get_method_error}")
-                try:
-                    # Получаем последние транзакции и извлекаем seqno из последней
-                    transactions = self._request("getTransactions", {
-                        "address": address,
-                        "limit": 1
-                    })
-                    
-                    if transactions and len(transactions) > 0:
-                        # Последняя транзакция содержит информацию о seqno
-                        last_tx = transactions[0]
-                        # В транзакции может быть поле in_msg или out_msgs с информацией о seqno
-                        # Ищем seqno в структуре транзакции
-                        # Обычно seqno находится в in_msg или в данных транзакции
-                        if "in_msg" in last_tx and last_tx["in_msg"]:
-                            in_msg = last_tx["in_msg"]
-                            # Проверяем, есть ли seqno в сообщении
-                            if "source" in in_msg and in_msg["source"] == address:
-                                # Это исходящее сообщение от нашего кошелька
-                                # Seqno может быть в структуре сообщения
-                                pass
-                        
-                        # Альтернативный способ: ищем seqno в out_msgs
-                        if "out_msgs" in last_tx and last_tx["out_msgs"]:
-                            for out_msg in last_tx["out_msgs"]:
-                                # Seqno может быть в структуре исходящего сообщения
-                                pass
-                        
-                        # Если не нашли seqno в транзакции, возвращаем 0
-                        logger.warning(f"Could not extract seqno from transactions for {address}")
-                        return 0
-                    else:
-                        logger.warning(f"No transactions found for {address}, using seqno=0")
-                        return 0
-                except Exception as tx_error:
-                    logger.warning(f"Could not get transactions for {address}: {tx_error}")
-                    return 0
-            
-            return 0
+            addr_info = self.get_address_information(address, cache=False)
         except Exception as e:
             # Если метод не найден (404), кошелек может быть не инициализирован
             # или использовать другой формат - возвращаем 0
@@ -344,11 +524,63 @@ class TonCenterClient:
                 f"Could not get seqno for {address}: {e}. "
                 f"Using seqno=0. This may cause issues if wallet is active."
             )
-            return 0
+            return {'seqno': 0, 'state': 'unknown', 'balance': '0'}
+        
+        account_state = addr_info.get("state", "")
+        bundle = {
+            'seqno': 0,
+            'state': account_state,
+            'balance': str(addr_info.get("balance", "0")),
+        }
+        
+        # Если адрес uninitialized или не существует, seqno = 0
+        if account_state in ("uninit", ""):
+            logger.debug(f"Wallet {address} is uninitialized, using seqno=0")
+            return bundle
+        
+        # Для стандартных кошельков seqno читается из data без runGetMethod
+        seqno = self._seqno_from_wallet_data(addr_info.get("data"))
+        if seqno is not None:
+            logger.debug(f"Got seqno={seqno} for wallet {address} from account data")
+            bundle['seqno'] = seqno
+            return bundle
+        
+        # Пробуем получить seqno через runGetMethod
+        try:
+            result = self.run_get_method(address, "seqno", cache=False)
+            # Документированный формат TonCenter: {"stack": [["num", "0x..."]]}
+            try:
+                kind, value = result["stack"][0]
+                seqno = int(value, 16) if kind == "num" else 0
+            except (KeyError, IndexError, TypeError, ValueError):
+                seqno = self._parse_seqno_stack(result.get("stack", [])) or 0
+            logger.debug(f"Got seqno={seqno} for wallet {address}")
+            bundle['seqno'] = seqno
+        except Exception as get_method_error:
+            # Из транзакций seqno не извлекается, поэтому getTransactions не запрашиваем
+            logger.warning(f"runGetMethod failed for {address}, using seqno=0: {get_method_error}")
+        
+        return bundle
+    
+    def get_wallet_seqno(self, address: str) -> int:
+        """
+        Получает текущий seqno кошелька.
+        
+        Args:
+            address: Адрес кошелька
+            
+        Returns:
+            int: Текущий seqno кошелька (или 0 если кошелек не инициализирован)
+        """
+        return self.get_wallet_state_bundle(address)['seqno']
     
     def close(self):
-        """Закрывает HTTP клиент."""
-        if hasattr(self, '_client'):
+        """
+        Закрывает HTTP клиент.
+        
+        Общий клиент (get_default_client) не закрывается - он живет до конца процесса.
+        """
+        if hasattr(self, '_client') and self._client is not _DEFAULT_CLIENT:
             self._client.close()
     
     def __enter__(self):
@@ -359,3 +591,291 @@ class TonCenterClient:
         """Поддержка context manager."""
         self.close()
 
+
+# Общий экземпляр TonCenterClient для всего процесса
+_SHARED_CLIENT: Optional[TonCenterClient] = None
+
+
+def get_client() -> TonCenterClient:
+    """
+    Возвращает общий экземпляр TonCenterClient (создается при первом вызове).
+    
+    Создание защищено блокировкой: потоки не создают каждый свой клиент.
+    Клиент закрывается при завершении процесса.
+    
+    Returns:
+        TonCenterClient: Клиент с настройками из окружения поверх общего HTTP пула
+    """
+    global _SHARED_CLIENT
+    if _SHARED_CLIENT is None:
+        with _SHARED_CLIENTS_LOCK:
+            if _SHARED_CLIENT is None:
+                _SHARED_CLIENT = TonCenterClient()
+                atexit.register(_close_shared_client)
+    return _SHARED_CLIENT
+
+
+def _close_shared_client() -> None:
+    """Закрывает общий TonCenterClient и его HTTP клиент при завершении процесса."""
+    global _SHARED_CLIENT
+    if _SHARED_CLIENT is not None:
+        _SHARED_CLIENT.close()
+        _SHARED_CLIENT = None
+    _close_default_client()
+
+
+class AsyncTonCenterClient:
+    """
+    Асинхронный клиент TonCenter API v2 для пакетных запросов.
+    
+    Запросы отправляются параллельно поверх одного HTTP/2 соединения,
+    поэтому N запросов занимают ~1 RTT вместо N.
+    """
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None
+    ):
+        """
+        Инициализирует асинхронный клиент TonCenter.
+        
+        Args:
+            api_key: API ключ для TonCenter (опционально, берется из TONCENTER_API_KEY)
+            base_url: Базовый URL TonCenter (по умолчанию https://toncenter.com/api/v2)
+        """
+        if httpx is None:
+            raise ImportError(
+                "httpx is required for AsyncTonCenterClient. "
+                "Install it with: pip install httpx"
+            )
+        
+        self.api_key = api_key or os.getenv("TONCENTER_API_KEY")
+        self.base_url = (base_url or os.getenv(
+            "TONCENTER_URL",
+            "https://toncenter.com/api/v2"
+        )).rstrip('/')
+        self._client: Optional["httpx.AsyncClient"] = None
+    
+    def _open_client(self) -> "httpx.AsyncClient":
+        """Создает AsyncClient с теми же настройками пула, что и sync клиент."""
+        return httpx.AsyncClient(
+            http2=True,
+            limits=_pool_limits(),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+    
+    async def __aenter__(self):
+        """Открывает одно HTTP/2 соединение на все запросы внутри блока async with."""
+        self._client = self._open_client()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Закрывает соединение."""
+        await self._client.aclose()
+        self._client = None
+    
+    async def _get(self, client: "httpx.AsyncClient", method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Выполняет один GET запрос к TonCenter API.
+        
+        Raises:
+            TonCenterError: Если запрос завершился с ошибкой
+        """
+        if self.api_key:
+            params = {**params, "api_key": self.api_key}
+        
+        try:
+            response = await client.get(f"{self.base_url}/{method}", params=params)
+            response.raise_for_status()
+            data = _json_loads(response.content)
+        except httpx.HTTPError as e:
+            raise TonCenterError(f"HTTP error: {e}") from e
+        
+        if not data.get("ok", False):
+            raise TonCenterError(f"TonCenter API error: {data.get('error', 'Unknown error')}")
+        
+        return data.get("result", {})
+    
+    async def batch_get_address_information(self, addresses: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Получает информацию о нескольких адресах параллельно.
+        
+        Args:
+            addresses: Список TON адресов
+            
+        Returns:
+            dict: Адрес -> информация об адресе. Адреса, для которых запрос
+            завершился ошибкой, отсутствуют в результате (ошибка логируется).
+        """
+        async with self._open_client() as client:
+            results = await asyncio.gather(
+                *(self._get(client, "getAddressInformation", {"address": address}) for address in addresses),
+                return_exceptions=True,
+            )
+        
+        info_by_address = {}
+        for address, result in zip(addresses, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not get address information for {address}: {result}")
+                continue
+            info_by_address[address] = result
+        
+        return info_by_address
+    
+    async def _send_boc(self, client: "httpx.AsyncClient", boc_base64: str, max_retries: int = 3) -> Dict[str, Any]:
+        """
+        Отправляет один BOC, повторяя запрос при rate limit (429).
+        
+        Raises:
+            TonCenterError: Если запрос завершился с ошибкой
+        """
+        params = {"boc": boc_base64}
+        if self.api_key:
+            params["api_key"] = self.api_key
+        retry_delay = 0.25  # секунды, как в TonCenterClient._request
+        
+        for attempt in range(max_retries + 1):
+            try:
+                response = await client.post(
+                    f"{self.base_url}/sendBoc",
+                    content=_json_dumps(params),
+                    headers={"Content-Type": "application/json"}
+                )
+                if response.status_code == 429 and attempt < max_retries:
+                    wait_time = _backoff_delay(retry_delay, attempt, response)
+                    logger.warning(
+                        f"Rate limit exceeded (429) for sendBoc. "
+                        f"Waiting {wait_time:.2f}s before retry {attempt + 1}/{max_retries}..."
+                    )
+                    await asyncio.sleep(wait_time)
+                    continue
+                response.raise_for_status()
+                data = _json_loads(response.content)
+            except httpx.HTTPError as e:
+                raise TonCenterError(f"HTTP error: {e}") from e
+            
+            if not data.get("ok", False):
+                raise TonCenterError(f"TonCenter API error: {data.get('error', 'Unknown error')}")
+            
+            return data.get("result", {})
+    
+    async def send_bocs(self, bocs: List[str]) -> List[Any]:
+        """
+        Отправляет несколько BOC параллельно поверх одного HTTP/2 соединения.
+        
+        Args:
+            bocs: BOC транзакций в формате base64
+            
+        Returns:
+            list: Результат отправки или TonCenterError для каждого BOC (в порядке bocs)
+        """
+        logger.info(f"Sending {len(bocs)} BOCs to TON network")
+        async with self._open_client() as client:
+            results = await asyncio.gather(
+                *(self._send_boc(client, boc) for boc in bocs),
+                return_exceptions=True,
+            )
+        
+        # Транзакции меняют seqno и состояние адресов - кешированные ответы устарели
+        invalidate_cache()
+        return list(results)
+    
+    async def _get_wallet_seqno(self, client: "httpx.AsyncClient", address: str) -> int:
+        """
+        Получает seqno кошелька: статус адреса и GET-метод seqno запрашиваются параллельно.
+        
+        Returns:
+            int: Текущий seqno кошелька (0 если кошелек не инициализирован)
+        """
+        addr_info, seqno_result = await asyncio.gather(
+            self._get(client, "getAddressInformation", {"address": address}),
+            self._get(client, "runGetMethod", {"address": address, "method": "seqno", "stack": []}),
+            return_exceptions=True,
+        )
+        if isinstance(addr_info, Exception):
+            raise addr_info
+        if addr_info.get("state", "") in ("uninit", ""):
+            return 0
+        if isinstance(seqno_result, Exception):
+            raise seqno_result
+        
+        seqno = TonCenterClient._parse_seqno_stack(seqno_result.get("stack", []))
+        return seqno if seqno is not None else 0
+    
+    async def get_wallet_seqno(self, address: str) -> int:
+        """
+        Получает seqno кошелька (внутри async with).
+        
+        Args:
+            address: Адрес кошелька
+            
+        Returns:
+            int: Текущий seqno кошелька (0 если кошелек не инициализирован)
+        """
+        return await self._get_wallet_seqno(self._client, address)
+    
+    async def wait_wallet_seqno(self, address: str, seqno: int, timeout: float) -> int:
+        """
+        Ждет, пока seqno кошелька станет больше seqno (сообщение попало в блок).
+        
+        Args:
+            address: Адрес кошелька
+            seqno: seqno отправленного сообщения
+            timeout: Сколько секунд ждать
+            
+        Returns:
+            int: Новый seqno кошелька
+            
+        Raises:
+            TimeoutError: Если seqno не изменился за timeout секунд
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            current = await self.get_wallet_seqno(address)
+            if current > seqno:
+                return current
+            if loop.time() >= deadline:
+                raise TimeoutError(f"Wallet seqno did not advance past {seqno} in {timeout}s")
+            await asyncio.sleep(1.0)
+    
+    async def send_boc(self, boc_base64: str) -> Dict[str, Any]:
+        """
+        Отправляет BOC в сеть TON (внутри async with).
+        
+        Args:
+            boc_base64: BOC транзакции в формате base64
+            
+        Returns:
+            dict: Результат отправки
+        """
+        result = await self._send_boc(self._client, boc_base64)
+        invalidate_cache()
+        return result
+    
+    async def batch_get_wallet_seqnos(self, addresses: List[str]) -> Dict[str, int]:
+        """
+        Получает seqno нескольких кошельков параллельно.
+        
+        Args:
+            addresses: Список адресов кошельков
+            
+        Returns:
+            dict: Адрес -> seqno. Адреса, для которых запрос завершился
+            ошибкой, отсутствуют в результате (ошибка логируется).
+        """
+        async with self._open_client() as client:
+            results = await asyncio.gather(
+                *(self._get_wallet_seqno(client, address) for address in addresses),
+                return_exceptions=True,
+            )
+        
+        seqno_by_address = {}
+        for address, result in zip(addresses, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not get seqno for {address}: {result}")
+                continue
+            seqno_by_address[address] = result
+        
+        return seqno_by_address
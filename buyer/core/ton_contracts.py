@@ -4,19 +4,22 @@
 Содержит константы и функции для сборки контрактов Deal.
 """
 
+import functools
 import os
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Tuple
 from decimal import Decimal
 import logging
 
 try:
     from tonsdk.boc import Cell, begin_cell
-    from tonsdk.utils import b64str_to_bytes
+    from tonsdk.utils import Address, b64str_to_bytes
     TONSDK_AVAILABLE = True
 except ImportError:
     TONSDK_AVAILABLE = False
     Cell = None
     begin_cell = None
+    Address = None
     b64str_to_bytes = None
 
 from .ton_utils import convert_ton_to_nano
@@ -35,6 +38,19 @@ if not DEAL_CODE_B64:
     logger.warning("DEAL_CONTRACT_CODE_B64 environment variable is not set")
 
 
+@functools.lru_cache(maxsize=4)
+def _decode_deal_code(deal_code_b64: str) -> Cell:
+    """
+    Разбирает BOC кода контракта (кешируется по строке base64).
+    
+    Код меняется только вместе с окружением, поэтому повторный разбор
+    одного и того же BOC не нужен. Возвращаемый Cell не изменяется вызывающими.
+    """
+    code_cell = Cell.one_from_boc(b64str_to_bytes(deal_code_b64))
+    logger.info("Deal contract code cell loaded successfully")
+    return code_cell
+
+
 def load_deal_code_cell() -> Cell:
     """
     Загружает Cell с кодом контракта Deal.
@@ -52,7 +68,8 @@ def load_deal_code_cell() -> Cell:
             "Install it with: pip install tonsdk"
         )
     
-    # Перечитываем переменную окружения каждый раз (на случай изменений)
+    # Перечитываем переменную окружения каждый раз (на случай изменений),
+    # разобранный Cell кешируется по значению переменной
     deal_code_b64 = os.getenv("DEAL_CONTRACT_CODE_B64", "").strip()
     
     if not deal_code_b64:
@@ -63,10 +80,7 @@ def load_deal_code_cell() -> Cell:
         )
     
     try:
-        code_bytes = b64str_to_bytes(deal_code_b64)
-        code_cell = Cell.one_from_boc(code_bytes)
-        logger.info("Deal contract code cell loaded successfully")
-        return code_cell
+        return _decode_deal_code(deal_code_b64)
     except Exception as e:
         logger.error(f"Failed to load deal code cell: {e}")
         raise ValueError(
@@ -75,6 +89,65 @@ def load_deal_code_cell() -> Cell:
         ) from e
 
 
+def reload_deal_code_cell() -> None:
+    """
+    Сбрасывает кеш разобранного кода контракта.
+    
+    Следующий вызов load_deal_code_cell заново разберет BOC из окружения.
+    """
+    _decode_deal_code.cache_clear()
+
+
+def parse_address(address) -> Address:
+    """
+    Разбирает TON адрес (строки кешируются - адреса сервиса и арбитра повторяются).
+    
+    Args:
+        address: Адрес строкой или объект Address
+        
+    Returns:
+        Address: Разобранный адрес (не изменять - объект общий для кеша)
+    """
+    if isinstance(address, str):
+        return _parse_address_str(address)
+    if isinstance(address, Address):
+        # Уже разобран: копия не нужна, вызывающие адрес не изменяют
+        return address
+    return Address(address)
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_address_str(address: str) -> Address:
+    """Разбирает строковый адрес (base64, CRC16, workchain) один раз."""
+    return Address(address)
+
+
+# Суммы init data: (ключ в nanoTON, ключ в TON)
+_AMOUNT_FIELDS = (
+    ('item_price_nano', 'item_price_ton'),
+    ('buyer_fee_nano', 'buyer_fee_ton'),
+    ('service_fee_nano', 'service_fee_ton'),
+    ('insurance_nano', 'insurance_ton'),
+)
+
+
+def amount_to_nano(value) -> int:
+    """Переводит сумму в nanoTON; через str() конвертируются только float и строки."""
+    if not isinstance(value, (Decimal, int)):
+        value = Decimal(str(value))
+    return convert_ton_to_nano(value)
+
+
+def _amount_nano(params: Dict[str, Any], nano_key: str, ton_key: str, default=None) -> int:
+    """Сумма в nanoTON: *_nano берется как есть, иначе конвертируется *_ton."""
+    nano = params.get(nano_key)
+    if nano is not None:
+        return int(nano)
+    if default is not None:
+        return amount_to_nano(params.get(ton_key, default))
+    return amount_to_nano(params[ton_key])
+
+
 def build_deal_init_data_cell(params: Dict[str, Any]) -> Cell:
     """
     Строит init data cell для контракта Deal.
@@ -108,6 +181,8 @@ def build_deal_init_data_cell(params: Dict[str, Any]) -> Cell:
             - shipping_budget_ton: Decimal - бюджет на доставку в TON (опционально, по умолчанию 0)
             - service_fee_ton: Decimal - комиссия сервиса в TON
             - insurance_ton: Decimal - страховка в TON
+            Вместо любой суммы *_ton можно передать *_nano (int, nanoTON) -
+            тогда конвертация не выполняется.
             - purchase_deadline_ts: int - timestamp дедлайна покупки
             - ship_deadline_ts: int - timestamp дедлайна отправки
             - confirm_deadline_ts: int - timestamp дедлайна подтверждения
@@ -124,21 +199,18 @@ def build_deal_init_data_cell(params: Dict[str, Any]) -> Cell:
         raise ImportError("tonsdk is required for contract operations")
     
     try:
-        from tonsdk.utils import Address
-        
         # Парсим адреса
-        customer_addr = Address(params['customer_address'])
-        buyer_addr = Address(params['buyer_address'])
-        service_addr = Address(params['service_wallet'])
-        arbiter_addr = Address(params['arbiter_wallet'])
+        customer_addr = parse_address(params['customer_address'])
+        buyer_addr = parse_address(params['buyer_address'])
+        service_addr = parse_address(params['service_wallet'])
+        arbiter_addr = parse_address(params['arbiter_wallet'])
         
-        # Конвертируем суммы в nanoTON
-        item_price_nano = convert_ton_to_nano(Decimal(str(params['item_price_ton'])))
-        buyer_fee_nano = convert_ton_to_nano(Decimal(str(params['buyer_fee_ton'])))
-        # shipping_budget_ton может отсутствовать в старых данных, используем 0 по умолчанию
-        shipping_budget_nano = convert_ton_to_nano(Decimal(str(params.get('shipping_budget_ton', '0'))))
-        service_fee_nano = convert_ton_to_nano(Decimal(str(params['service_fee_ton'])))
-        insurance_nano = convert_ton_to_nano(Decimal(str(params['insurance_ton'])))
+        # Суммы в nanoTON (*_nano передаются без конвертации)
+        item_price_nano, buyer_fee_nano, service_fee_nano, insurance_nano = (
+            _amount_nano(params, nano_key, ton_key) for nano_key, ton_key in _AMOUNT_FIELDS
+        )
+        # shipping budget может отсутствовать в старых данных, используем 0 по умолчанию
+        shipping_budget_nano = _amount_nano(params, 'shipping_budget_nano', 'shipping_budget_ton', default=0)
         
         # Получаем таймстемпы
         purchase_deadline = int(params['purchase_deadline_ts'])
@@ -152,16 +224,13 @@ def build_deal_init_data_cell(params: Dict[str, Any]) -> Cell:
         elif not isinstance(metadata_hash, bytes):
             raise ValueError("metadata_hash must be bytes or hex string")
         
-        # Берем первые 32 bytes и конвертируем в int (uint256)
+        # Берем первые 32 bytes (uint256)
         # Если hash меньше 32 bytes, дополняем нулями
         if len(metadata_hash) < 32:
             metadata_hash = metadata_hash + b'\x00' * (32 - len(metadata_hash))
         elif len(metadata_hash) > 32:
             metadata_hash = metadata_hash[:32]
         
-        # Конвертируем bytes в int (big-endian)
-        metadata_hash_uint256 = int.from_bytes(metadata_hash, byteorder='big')
-        
         # Собираем init data cell
         # Структура точно соответствует тому, как Tact упаковывает данные (см. initDeal_init_args):
         #
@@ -191,7 +260,7 @@ def build_deal_init_data_cell(params: Dict[str, Any]) -> Cell:
         b_2 = (
             begin_cell()
             .store_uint(confirm_deadline, 64)
-            .store_uint(metadata_hash_uint256, 256)
+            .store_bytes(metadata_hash)  # те же биты, что store_uint(big-endian, 256)
             .end_cell()
         )
         
@@ -231,6 +300,37 @@ def build_deal_init_data_cell(params: Dict[str, Any]) -> Cell:
         raise ValueError(f"Invalid parameters: {e}") from e
 
 
+# Биты state_init: split_depth = None (0), special = None (0), code = Some (1),
+# data = Some (1), library = None (0); code и data - ссылки
+_STATE_INIT_HEADER_BITS = 5
+_STATE_INIT_HEADER_BYTE = 0b00110000
+
+
+def build_state_init(code_cell: Cell, init_data_cell: Cell) -> Cell:
+    """
+    Собирает state_init контракта.
+    
+    Структура TON: split_depth: None, special: None, code: Some, data: Some, library: None.
+    
+    Args:
+        code_cell: Cell с кодом контракта
+        init_data_cell: Cell с init data
+        
+    Returns:
+        Cell: state_init контракта
+    """
+    if not TONSDK_AVAILABLE:
+        raise ImportError("tonsdk is required for contract operations")
+    
+    # Заголовок всегда одинаковый, поэтому записывается в массив бит готовым байтом
+    # вместо цепочки begin_cell().store_bit(...)
+    state_init = Cell()
+    state_init.bits.array[0] = _STATE_INIT_HEADER_BYTE
+    state_init.bits.cursor = _STATE_INIT_HEADER_BITS
+    state_init.refs.extend((code_cell, init_data_cell))
+    return state_init
+
+
 def calculate_contract_address(code_cell: Cell, init_data_cell: Cell, workchain: int = 0) -> str:
     """
     Вычисляет адрес контракта по коду и init data.
@@ -247,48 +347,66 @@ def calculate_contract_address(code_cell: Cell, init_data_cell: Cell, workchain:
         raise ImportError("tonsdk is required for contract operations")
     
     try:
-        from tonsdk.boc import begin_cell
-        from tonsdk.utils import Address
-        import hashlib
-        
-        # Собираем state_init согласно структуре TON (как в ton_wallet.py):
-        # split_depth: None, special: None, code: Some, data: Some, library: None
-        state_init = (
-            begin_cell()
-            .store_bit(0)  # split_depth = None
-            .store_bit(0)  # special = None
-            .store_bit(1)  # code = Some
-            .store_ref(code_cell)
-            .store_bit(1)  # data = Some
-            .store_ref(init_data_cell)
-            .store_bit(0)  # library = None
-            .end_cell()
-        )
-        
-        # Вычисляем hash state_init для адреса контракта
-        # В TON адрес контракта вычисляется как hash от state_init
-        # Алгоритм: берем state_init, вычисляем hash, создаем адрес
-        
-        # Получаем hash representation state_init
-        state_init_boc = state_init.to_boc(False)  # False = без index
-        
-        # Вычисляем hash_part (первые 32 байта SHA256)
-        hash_part = hashlib.sha256(state_init_boc).digest()
-        
-        # Создаем адрес: workchain (int) + hash_part (bytes)
-        # Address принимает либо строку формата "workchain:hash_hex", либо workchain и hash_part отдельно
-        # Попробуем создать через конструктор с workchain и hash_part
-        try:
-            # Формат: Address(workchain, hash_part_bytes)
-            contract_address_obj = Address(workchain, hash_part)
-            contract_address = contract_address_obj.to_string(True, True, True)
-        except (TypeError, ValueError):
-            # Fallback: используем строковый формат
-            address_str = f"{workchain}:{hash_part.hex()}"
-            contract_address = Address(address_str).to_string(True, True, True)
-        
-        return contract_address
+        if workchain == 0:
+            return state_init_and_address(code_cell, init_data_cell)[1]
+        return contract_address_from_state_init(build_state_init(code_cell, init_data_cell), workchain)
     except Exception as e:
         logger.error(f"Failed to calculate contract address: {e}", exc_info=True)
         raise
 
+
+def contract_address_from_state_init(state_init: Cell, workchain: int = 0) -> str:
+    """
+    Вычисляет адрес контракта по уже собранному state_init.
+    
+    Args:
+        state_init: Cell state_init (см. build_state_init)
+        workchain: Workchain (обычно 0 для masterchain)
+        
+    Returns:
+        str: Адрес контракта в формате EQ...
+    """
+    # Адрес контракта - representation hash state_init (Cell.bytes_hash),
+    # а не SHA256 от сериализованного BOC
+    hash_part = state_init.bytes_hash()
+    
+    # Address принимает только одну форму адреса, используем "workchain:hash_hex"
+    return Address(f"{workchain}:{hash_part.hex()}").to_string(True, True, True)
+
+
+# Адреса контрактов (workchain 0): hash кода + hash init data -> адрес.
+# Ключ собирается из bytes (неизменяемых значений) на каждый вызов, поэтому
+# изменение ячеек вызывающим дает новый ключ, а не устаревший адрес.
+ADDRESS_CACHE_SIZE = 1024
+_ADDRESS_CACHE: Dict[bytes, str] = {}
+_ADDRESS_CACHE_LOCK = threading.Lock()
+
+
+def state_init_and_address(code_cell: Cell, init_data_cell: Cell) -> Tuple[Cell, str]:
+    """
+    Возвращает state_init контракта и его адрес (workchain 0), с кешированием адреса.
+    
+    state_init собирается заново на каждый вызов (заголовок и две ссылки) и
+    принадлежит вызывающему; кешируется только адрес, чтобы не хешировать
+    state_init повторно.
+    
+    Args:
+        code_cell: Cell с кодом контракта
+        init_data_cell: Cell с init data
+        
+    Returns:
+        Tuple[Cell, str]: (state_init, адрес контракта в формате EQ...)
+    """
+    state_init = build_state_init(code_cell, init_data_cell)
+    cache_key = bytes(code_cell.bytes_hash()) + bytes(init_data_cell.bytes_hash())
+    contract_address = _ADDRESS_CACHE.get(cache_key)
+    if contract_address is not None:
+        return state_init, contract_address
+    
+    contract_address = contract_address_from_state_init(state_init)
+    with _ADDRESS_CACHE_LOCK:
+        if len(_ADDRESS_CACHE) >= ADDRESS_CACHE_SIZE:
+            # Вытесняем самую старую запись (dict хранит порядок вставки)
+            _ADDRESS_CACHE.pop(next(iter(_ADDRESS_CACHE)), None)
+        _ADDRESS_CACHE[cache_key] = contract_address
+    return state_init, contract_address
@@ -3,6 +3,7 @@
 
 Pytonlib - официальная Python библиотека TON, которая правильно работает с state_init.
 """
+import asyncio
 import os
 import logging
 from decimal import Decimal
@@ -49,52 +50,52 @@ def deploy_contract_with_pytonlib(
             "Install with: pip install pytonlib"
         )
     
-    from tonsdk.boc import begin_cell
-    from tonsdk.utils import to_nano, bytes_to_b64str
-    from core.ton_contracts import calculate_contract_address
-    import asyncio
-    
     logger.info(f"Deploying contract via pytonlib (network: {network})")
     
-    # Вычисляем адрес контракта
-    contract_address = calculate_contract_address(code_cell, init_data_cell)
-    logger.info(f"Contract address: {contract_address}")
+    contract_address, state_init_boc = _prepare_deploy(code_cell, init_data_cell)
     
-    # Создаем state_init
-    state_init = (
-        begin_cell()
-        .store_bit(0)  # split_depth = None
-        .store_bit(0)  # special = None
-        .store_bit(1)  # code = Some
-        .store_ref(code_cell)
-        .store_bit(1)  # data = Some
-        .store_ref(init_data_cell)
-        .store_bit(0)  # library = None
-        .end_cell()
+    # Запускаем асинхронную функцию (asyncio.run сам создает и закрывает цикл)
+    contract_addr, tx_hash = asyncio.run(
+        _deploy_async(contract_address, state_init_boc, amount_ton, wallet_mnemonic, seqno, network)
     )
+    return contract_addr, tx_hash
+
+
+def _prepare_deploy(code_cell, init_data_cell) -> Tuple[str, bytes]:
+    """
+    Вычисляет адрес контракта и BOC его state_init.
     
-    # Конвертируем state_init в BOC
-    state_init_boc = state_init.to_boc(False)
-    state_init_b64 = bytes_to_b64str(state_init_boc)
+    Returns:
+        Tuple[str, bytes]: (contract_address, state_init_boc)
+    """
+    from core.ton_contracts import state_init_and_address
     
-    async def deploy_async():
-        # Для pytonlib нужно создать клиент с правильной конфигурацией
-        # Это сложно и требует дополнительных настроек
-        # Пока возвращаем ошибку о том, что требуется настройка
-        raise NotImplementedError(
-            "Pytonlib deployment requires additional configuration. "
-            "Please use alternative method or configure pytonlib properly. "
-            "See: https://github.com/toncenter/pytonlib"
-        )
+    # Создаем state_init, по нему вычисляем адрес и BOC
+    state_init, contract_address = state_init_and_address(code_cell, init_data_cell)
+    logger.info(f"Contract address: {contract_address}")
     
-    # Запускаем асинхронную функцию
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        contract_addr, tx_hash = loop.run_until_complete(deploy_async())
-        return contract_addr, tx_hash
-    finally:
-        loop.close()
+    state_init_boc = state_init.to_boc(has_idx=False, hash_crc32=False)
+    
+    return contract_address, state_init_boc
+
+
+async def _deploy_async(
+    contract_address: str,
+    state_init_boc: bytes,
+    amount_ton: Decimal,
+    wallet_mnemonic: str,
+    seqno: int,
+    network: str
+) -> Tuple[str, str]:
+    """Отправляет деплой-сообщение через pytonlib."""
+    # Для pytonlib нужно создать клиент с правильной конфигурацией
+    # Это сложно и требует дополнительных настроек
+    # Пока возвращаем ошибку о том, что требуется настройка
+    raise NotImplementedError(
+        "Pytonlib deployment requires additional configuration. "
+        "Please use alternative method or configure pytonlib properly. "
+        "See: https://github.com/toncenter/pytonlib"
+    )
 
 
 # Альтернативный вариант - использовать pytonlib без async (синхронный wrapper)
@@ -3,14 +3,177 @@
 
 Использует ручное создание сообщения через tonsdk для гарантированного включения state_init.
 """
+import asyncio
+import functools
+import hashlib
 import os
+import threading
+import time
 import logging
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from tonsdk.contract import Contract
+    from tonsdk.contract.wallet import WalletV3ContractR2
+    from tonsdk.crypto import mnemonic_is_valid, mnemonic_to_wallet_key
+    TONSDK_AVAILABLE = True
+except ImportError:
+    TONSDK_AVAILABLE = False
+
+from core.ton_client import AsyncTonCenterClient, get_client
+from core.ton_contracts import amount_to_nano, parse_address, state_init_and_address
 
 logger = logging.getLogger(__name__)
 
 
+class DeployBatchError(Exception):
+    """
+    Ошибка пакетного деплоя.
+    
+    Attributes:
+        results: (contract_address, transaction_hash) контрактов из пачек,
+            отправленных до ошибки (их нельзя деплоить повторно)
+    """
+    
+    def __init__(self, message: str, results: List[Tuple[str, str]]):
+        super().__init__(message)
+        self.results = results
+
+# PBKDF2 (hashlib) и подпись Ed25519 (nacl) отпускают GIL, поэтому
+# параллельные деплои в потоках масштабируются до числа ядер
+_DEPLOY_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="ton-deploy")
+
+# Кошелек v3r2 принимает не более 4 внутренних сообщений в одном внешнем
+MAX_DEPLOYS_PER_MESSAGE = 4
+DEPLOY_BATCH_SIZE = max(1, min(int(os.getenv("TON_DEPLOY_BATCH_SIZE", "4")), MAX_DEPLOYS_PER_MESSAGE))
+DEPLOY_SEND_MODE = 3
+
+
+# Подписанные BOC деплоя: (кошелек, контракт, seqno, сумма, hash state_init) -> (BOC, время сборки).
+# Повтор отправки после сбоя TonCenter не подписывает заново. tonsdk ставит в сообщение
+# valid_until = now + 60, поэтому BOC переиспользуется не дольше SIGNED_BOC_TTL секунд
+SIGNED_BOC_CACHE_SIZE = 256
+SIGNED_BOC_TTL = 30.0
+_SIGNED_BOC_CACHE: Dict[tuple, Tuple[str, float]] = {}
+_SIGNED_BOC_CACHE_LOCK = threading.Lock()
+
+# Ключи Ed25519, выведенные из mnemonic: sha256(mnemonic) -> (private_key, public_key)
+_KEYPAIR_CACHE: Dict[bytes, Tuple[bytes, bytes]] = {}
+_KEYPAIR_CACHE_LOCK = threading.Lock()
+
+
+def mnemonic_to_ed25519(wallet_mnemonic: str) -> Tuple[bytes, bytes]:
+    """
+    Возвращает пару ключей кошелька для mnemonic (вычисляется один раз на процесс).
+    
+    Ключи выводятся так же, как в Wallets.from_mnemonics (PBKDF2 tonsdk), поэтому
+    подпись совпадает с public_key кошелька. В кеше ключом служит SHA-256
+    mnemonic, а не сама фраза.
+    
+    Args:
+        wallet_mnemonic: Mnemonic фраза кошелька
+        
+    Returns:
+        Tuple[bytes, bytes]: (private_key (64 байта, формат tonsdk/nacl), public_key)
+        
+    Raises:
+        ValueError: Если mnemonic невалидна
+    """
+    cache_key = hashlib.sha256(wallet_mnemonic.encode("utf-8")).digest()
+    keypair = _KEYPAIR_CACHE.get(cache_key)
+    if keypair is not None:
+        return keypair
+    
+    mnemonic_words = wallet_mnemonic.split()
+    if not mnemonic_is_valid(mnemonic_words):
+        raise ValueError("Invalid wallet mnemonic")
+    public_key, private_key = mnemonic_to_wallet_key(mnemonic_words)
+    
+    with _KEYPAIR_CACHE_LOCK:
+        return _KEYPAIR_CACHE.setdefault(cache_key, (private_key, public_key))
+
+
+def _append_deploy_message(signing_message, contract_address, amount_nano: int, state_init) -> None:
+    """
+    Добавляет в signing message кошелька внутреннее сообщение деплоя.
+    
+    Сообщение собирается штатными функциями tonsdk (int_msg_info и state_init
+    по схеме TL-B), send_mode = DEPLOY_SEND_MODE.
+    
+    Args:
+        signing_message: Cell из wallet.create_signing_message(seqno)
+        contract_address: Адрес контракта
+        amount_nano: Сумма для отправки на контракт в nanoTON
+        state_init: Cell state_init контракта
+    """
+    header = Contract.create_internal_message_header(parse_address(contract_address), Decimal(amount_nano))
+    signing_message.bits.write_uint8(DEPLOY_SEND_MODE)
+    signing_message.refs.append(Contract.create_common_msg_info(header, state_init, None))
+
+
+def build_deploy_boc(
+    state_init,
+    contract_address: str,
+    amount_ton: Decimal,
+    wallet,
+    seqno: int
+) -> str:
+    """
+    Собирает и подписывает внешнее сообщение деплоя (без отправки).
+    
+    Внешнее сообщение (ext_in_msg_info, подпись, signing message) собирает
+    wallet.create_external_message, поэтому формат соответствует версии кошелька.
+    Результат кешируется по входным данным (включая hash state_init), поэтому
+    повторный вызов для той же пары seqno/контракт в пределах SIGNED_BOC_TTL
+    возвращает готовый BOC.
+    
+    Args:
+        state_init: Cell state_init контракта
+        contract_address: Адрес контракта
+        amount_ton: Сумма для отправки на контракт
+        wallet: Кошелек tonsdk с приватным ключом (отправитель)
+        seqno: Sequence number кошелька
+        
+    Returns:
+        str: BOC внешнего сообщения в base64
+    """
+    # Конвертируем amount в nanoTON точно, без промежуточного float
+    amount_nano = amount_to_nano(amount_ton)
+    
+    wallet_addr = wallet.address
+    contract_addr = parse_address(contract_address)
+    
+    cache_key = (
+        wallet_addr.wc,
+        bytes(wallet_addr.hash_part),
+        contract_addr.wc,
+        bytes(contract_addr.hash_part),
+        seqno,
+        amount_nano,
+        state_init.bytes_hash(),
+    )
+    cached = _SIGNED_BOC_CACHE.get(cache_key)
+    if cached is not None and time.monotonic() - cached[1] < SIGNED_BOC_TTL:
+        return cached[0]
+    
+    signing_message = wallet.create_signing_message(seqno)
+    _append_deploy_message(signing_message, contract_addr, amount_nano, state_init)
+    query = wallet.create_external_message(signing_message, seqno)
+    
+    # CRC32C в tonsdk считается побитовым циклом на Python; поле в BOC необязательное
+    boc_b64 = b64encode(query["message"].to_boc(has_idx=False, hash_crc32=False)).decode("ascii")
+    
+    with _SIGNED_BOC_CACHE_LOCK:
+        if len(_SIGNED_BOC_CACHE) >= SIGNED_BOC_CACHE_SIZE:
+            # Вытесняем самую старую запись (dict хранит порядок вставки)
+            _SIGNED_BOC_CACHE.pop(next(iter(_SIGNED_BOC_CACHE)), None)
+        _SIGNED_BOC_CACHE[cache_key] = (boc_b64, time.monotonic())
+    return boc_b64
+
+
 def deploy_contract_with_manual_state_init(
     code_cell,
     init_data_cell,
@@ -23,6 +186,8 @@ def deploy_contract_with_manual_state_init(
     Деплоит контракт с правильным включением state_init.
     
     Создает сообщение вручную через tonsdk, гарантируя включение state_init.
+    Отправителем всегда выступает кошелек v3r2, выведенный из wallet_mnemonic,
+    поэтому переданный seqno должен относиться к этому кошельку.
     
     Args:
         code_cell: Cell с кодом контракта
@@ -35,69 +200,27 @@ def deploy_contract_with_manual_state_init(
     Returns:
         Tuple[str, str]: (contract_address, transaction_hash)
     """
-    from tonsdk.boc import begin_cell
-    from tonsdk.utils import to_nano, bytes_to_b64str, Address as TonAddress
-    from core.ton_contracts import calculate_contract_address
-    from core.ton_client import TonCenterClient
-    from tonsdk.contract.wallet import Wallets, WalletVersionEnum
-    import hashlib
-    import nacl.signing
-    import nacl.encoding
-    from mnemonic import Mnemonic
+    if not TONSDK_AVAILABLE:
+        raise ImportError(
+            "tonsdk and pynacl are required for contract deployment. "
+            "Install them with: pip install tonsdk pynacl"
+        )
+    
+    ton_client = get_client()
     
     logger.info(f"Deploying contract with manual state_init (network: {network})")
     
-    # Вычисляем адрес контракта
-    contract_address = calculate_contract_address(code_cell, init_data_cell)
+    # Создаем state_init и вычисляем по нему адрес контракта
+    state_init, contract_address = state_init_and_address(code_cell, init_data_cell)
     logger.info(f"Contract address: {contract_address}")
     
-    # Создаем state_init
-    state_init = (
-        begin_cell()
-        .store_bit(0)  # split_depth = None
-        .store_bit(0)  # special = None
-        .store_bit(1)  # code = Some
-        .store_ref(code_cell)
-        .store_bit(1)  # data = Some
-        .store_ref(init_data_cell)
-        .store_bit(0)  # library = None
-        .end_cell()
-    )
-    
-    # Получаем кошелек из mnemonic через tonsdk
-    mnemonic_words = wallet_mnemonic.split()
-    wallet_result = Wallets.from_mnemonics(
-        mnemonics=mnemonic_words,
-        wallet_version=WalletVersionEnum.v3r2,
-        workchain=0
-    )
-    
-    # Извлекаем wallet объект
-    wallet = None
-    if isinstance(wallet_result, tuple):
-        for item in wallet_result:
-            if hasattr(item, 'address'):
-                wallet = item
-                break
-        if wallet is None and len(wallet_result) > 0:
-            wallet = wallet_result[0]
-    elif isinstance(wallet_result, list):
-        for item in wallet_result:
-            if hasattr(item, 'address'):
-                wallet = item
-                break
-        if wallet is None and len(wallet_result) > 0:
-            wallet = wallet_result[0]
-    else:
-        wallet = wallet_result
-    
-    if wallet is None or not hasattr(wallet, 'address'):
-        raise ValueError(f"Could not extract wallet object. Type: {type(wallet_result)}")
+    # Кошелек v3r2 строится из закешированных ключей, без повторного PBKDF2
+    private_key, public_key = mnemonic_to_ed25519(wallet_mnemonic)
+    wallet = WalletV3ContractR2(public_key=public_key, private_key=private_key, wc=0)
     
     # Получаем seqno если не указан
     if seqno is None or seqno < 0:
         try:
-            ton_client = TonCenterClient()
             wallet_address = wallet.address.to_string(True, True, True)
             seqno = ton_client.get_wallet_seqno(wallet_address)
             if seqno == 0:
@@ -107,69 +230,9 @@ def deploy_contract_with_manual_state_init(
             logger.warning(f"Could not get seqno automatically: {e}, using seqno=0")
             seqno = 0
     
-    # Конвертируем amount в nanoTON
-    amount_nano = int(to_nano(float(amount_ton), "ton"))
-    
-    # Создаем внутреннее сообщение с state_init вручную
-    # tonsdk create_transfer_message НЕ включает state_init правильно
-    wallet_addr = TonAddress(wallet.address)
-    contract_addr = TonAddress(contract_address)
-    
-    # Создаем внутреннее сообщение с state_init
-    internal_message = (
-        begin_cell()
-        .store_uint(0, 1)  # ihr_disabled = 0
-        .store_uint(1, 1)  # bounce = 1
-        .store_uint(0, 1)  # bounced = 0
-        .store_address(wallet_addr)  # src
-        .store_address(contract_addr)  # dst
-        .store_coins(amount_nano)  # value
-        .store_bit(0)  # extra_currencies = None
-        .store_bit(1)  # init = Some
-        .store_ref(state_init)  # state_init
-        .store_bit(0)  # body = None
-        .end_cell()
-    )
-    
-    # Создаем signing message для v3r2
-    subwallet_id = 698983191  # стандартный для v3r2
-    valid_until = 4294967295
-    
-    signing_message = (
-        begin_cell()
-        .store_uint(subwallet_id, 32)
-        .store_uint(valid_until, 32)
-        .store_uint(seqno, 32)
-        .store_uint(0, 8)  # op = 0
-        .store_uint(0, 64)  # query_id = 0
-        .store_ref(internal_message)
-        .end_cell()
-    )
-    
-    # Получаем приватный ключ для подписи
-    mnemo = Mnemonic("english")
-    seed = mnemo.to_seed(wallet_mnemonic, passphrase="")
-    private_key = seed[:32]
-    
-    # Подписываем сообщение
-    signing_message_boc = signing_message.to_boc(False)
-    message_hash = hashlib.sha256(signing_message_boc).digest()
-    signing_key = nacl.signing.SigningKey(private_key, encoder=nacl.encoding.RawEncoder)
-    signed = signing_key.sign(message_hash, encoder=nacl.encoding.RawEncoder)
-    signature = signed.signature  # 64 bytes
-    
-    # Создаем внешнее сообщение с подписью
-    external_message = (
-        begin_cell()
-        .store_bytes(signature)
-        .store_ref(signing_message)
-        .end_cell()
-    )
-    
-    boc_b64 = bytes_to_b64str(external_message.to_boc(False))
+    boc_b64 = build_deploy_boc(state_init, contract_address, amount_ton, wallet, seqno)
     
     # Отправляем через TonCenter API
-    ton_client = TonCenterClient()
     result = ton_client.send_boc(boc_b64)
     
     logger.info(f"Deploy transaction sent via TonCenter (manual state_init): {result}")
@@ -179,3 +242,167 @@ def deploy_contract_with_manual_state_init(
     tx_hash = "sent"  # Hash будет доступен после обработки транзакции
     
     return contract_address, tx_hash
+
+
+async def deploy_contract_with_manual_state_init_async(
+    code_cell,
+    init_data_cell,
+    amount_ton: Decimal,
+    wallet_mnemonic: str,
+    seqno: Optional[int] = None,
+    network: str = "testnet"
+) -> Tuple[str, str]:
+    """
+    Асинхронный вариант deploy_contract_with_manual_state_init.
+    
+    Деплой выполняется в пуле потоков, не блокируя цикл событий.
+    При нескольких одновременных деплоях с одного кошелька seqno
+    должен передаваться явно (у каждого свой).
+    
+    Args:
+        code_cell: Cell с кодом контракта
+        init_data_cell: Cell с init data
+        amount_ton: Сумма для отправки на контракт
+        wallet_mnemonic: Mnemonic фраза кошелька (24 слова)
+        seqno: Sequence number кошелька (опционально)
+        network: Сеть ("testnet" или "mainnet")
+        
+    Returns:
+        Tuple[str, str]: (contract_address, transaction_hash)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _DEPLOY_EXECUTOR,
+        functools.partial(
+            deploy_contract_with_manual_state_init,
+            code_cell,
+            init_data_cell,
+            amount_ton,
+            wallet_mnemonic,
+            seqno=seqno,
+            network=network,
+        )
+    )
+
+
+def _build_signed_batch_boc(wallet, batch: List[Tuple[Any, Any, int]], seqno: int) -> Tuple[List[str], str]:
+    """
+    Собирает и подписывает одно внешнее сообщение кошелька с пачкой деплоев.
+    
+    Args:
+        wallet: Кошелек tonsdk с приватным ключом (отправитель)
+        batch: Кортежи (code_cell, init_data_cell, сумма в nanoTON)
+        seqno: seqno кошелька
+        
+    Returns:
+        Tuple[List[str], str]: (адреса контрактов, BOC внешнего сообщения в base64)
+    """
+    signing_message = wallet.create_signing_message(seqno)
+    contract_addresses = []
+    for code_cell, init_data_cell, amount_nano in batch:
+        state_init, contract_address = state_init_and_address(code_cell, init_data_cell)
+        _append_deploy_message(signing_message, contract_address, amount_nano, state_init)
+        contract_addresses.append(contract_address)
+    
+    query = wallet.create_external_message(signing_message, seqno)
+    return contract_addresses, b64encode(query["message"].to_boc(has_idx=False, hash_crc32=False)).decode("ascii")
+
+
+async def deploy_contracts_async(
+    deploys: List[Tuple[Any, Any, Decimal]],
+    wallet_mnemonic: str,
+    seqno: Optional[int] = None,
+    seqno_timeout: float = 60.0
+) -> List[Tuple[str, str]]:
+    """
+    Деплоит несколько контрактов минимальным числом внешних сообщений.
+    
+    Отправитель - кошелек v3r2, выведенный из wallet_mnemonic (seqno, если
+    передан, должен относиться к нему).
+    
+    До DEPLOY_BATCH_SIZE деплоев (каждый со своим state_init) упаковываются
+    в одно сообщение кошелька: один seqno и один sendBoc на пачку. JSON-RPC
+    batch TonCenter не поддерживает, а кошелек примет seqno + 1 только после
+    попадания предыдущего сообщения в блок, поэтому пачки отправляются по
+    очереди и каждая подписывается с фактическим seqno кошелька.
+    
+    Args:
+        deploys: Кортежи (code_cell, init_data_cell, amount_ton)
+        wallet_mnemonic: Mnemonic фраза кошелька (24 слова)
+        seqno: Sequence number кошелька для первой пачки (опционально)
+        seqno_timeout: Сколько секунд ждать подтверждения предыдущей пачки
+        
+    Returns:
+        List[Tuple[str, str]]: (contract_address, transaction_hash) в порядке deploys
+        
+    Raises:
+        DeployBatchError: Если пачка не отправлена (в results - уже отправленные контракты)
+    """
+    if not TONSDK_AVAILABLE:
+        raise ImportError(
+            "tonsdk and pynacl are required for contract deployment. "
+            "Install them with: pip install tonsdk pynacl"
+        )
+    
+    loop = asyncio.get_running_loop()
+    ton_client = get_client()
+    
+    private_key, public_key = await loop.run_in_executor(_DEPLOY_EXECUTOR, mnemonic_to_ed25519, wallet_mnemonic)
+    wallet = WalletV3ContractR2(public_key=public_key, private_key=private_key, wc=0)
+    wallet_address = wallet.address.to_string(True, True, True)
+    
+    batches = [
+        [
+            (code_cell, init_data_cell, amount_to_nano(amount_ton))
+            for code_cell, init_data_cell, amount_ton in deploys[start:start + DEPLOY_BATCH_SIZE]
+        ]
+        for start in range(0, len(deploys), DEPLOY_BATCH_SIZE)
+    ]
+    
+    async with AsyncTonCenterClient(api_key=ton_client.api_key, base_url=ton_client.base_url) as client:
+        if seqno is None or seqno < 0:
+            seqno = await client.get_wallet_seqno(wallet_address)
+        
+        logger.info(f"Deploying {len(deploys)} contracts in {len(batches)} batches (seqno={seqno})")
+        
+        results = []
+        for index, batch in enumerate(batches):
+            try:
+                if index:
+                    seqno = await client.wait_wallet_seqno(wallet_address, seqno, seqno_timeout)
+                
+                contract_addresses, boc_b64 = _build_signed_batch_boc(wallet, batch, seqno)
+                result = await client.send_boc(boc_b64)
+            except Exception as e:
+                # Уже отправленные пачки возвращаем вызывающему, чтобы повтор их не задеплоил
+                logger.error(f"Deploy batch {index + 1}/{len(batches)} failed after {len(results)} sent contracts: {e}")
+                raise DeployBatchError(f"Deploy batch {index + 1}/{len(batches)} failed: {e}", results) from e
+            logger.info(f"Deploy batch sent (seqno={seqno}, contracts={len(batch)}): {result}")
+            
+            results.extend((contract_address, "sent") for contract_address in contract_addresses)
+    
+    return results
+
+
+def deploy_contracts_batch(
+    deploys: List[Tuple[Any, Any, Decimal]],
+    wallet_mnemonic: str,
+    seqno: Optional[int] = None,
+    seqno_timeout: float = 60.0
+) -> List[Tuple[str, str]]:
+    """
+    Синхронная обёртка для deploy_contracts_async.
+    
+    Args:
+        deploys: Кортежи (code_cell, init_data_cell, amount_ton)
+        wallet_mnemonic: Mnemonic фраза кошелька (24 слова)
+        seqno: Sequence number кошелька для первой пачки (опционально)
+        seqno_timeout: Сколько секунд ждать подтверждения предыдущей пачки
+        
+    Returns:
+        List[Tuple[str, str]]: (contract_address, transaction_hash) в порядке deploys
+        
+    Raises:
+        DeployBatchError: Если пачка не отправлена (в results - уже отправленные контракты)
+    """
+    return asyncio.run(deploy_contracts_async(deploys, wallet_mnemonic, seqno=seqno, seqno_timeout=seqno_timeout))
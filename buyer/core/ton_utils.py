@@ -4,16 +4,20 @@
 Модуль для деплоя и взаимодействия со смарт-контрактами Deal.
 """
 
+import functools
 import os
 import hashlib
+import struct
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 from decimal import Decimal
 import logging
 
 from django.conf import settings
 from django.utils import timezone
 
+from .ton_client import TonCenterError
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,18 +39,45 @@ class DealOnchainParams:
     confirm_deadline_ts: int  # Unix timestamp дедлайна подтверждения
     metadata_hash_cell: bytes  # Hash метаданных
 
+    def _canonical_bytes(self) -> bytes:
+        """Компактное бинарное представление параметров (для детерминированных хешей)."""
+        numbers = struct.pack(
+            '<8Q',
+            self.item_price_nano,
+            self.buyer_fee_nano,
+            self.shipping_budget_nano,
+            self.service_fee_nano,
+            self.insurance_nano,
+            self.purchase_deadline_ts,
+            self.ship_deadline_ts,
+            self.confirm_deadline_ts,
+        )
+        addresses = '\0'.join((
+            self.customer_address,
+            self.buyer_address,
+            self.service_wallet,
+            self.arbiter_wallet,
+        )).encode('utf-8')
+        return numbers + self.metadata_hash_cell + addresses
+
+
+NANOTON_PER_TON = 1_000_000_000
 
-def convert_ton_to_nano(ton_amount: Decimal) -> int:
+
+def convert_ton_to_nano(ton_amount: Union[Decimal, int]) -> int:
     """
     Конвертирует TON в nanoTON (1 TON = 1e9 nanoTON).
 
     Args:
-        ton_amount: Сумма в TON
+        ton_amount: Сумма в TON (Decimal или int)
 
     Returns:
         int: Сумма в nanoTON
     """
-    return int(ton_amount * Decimal('1000000000'))
+    if isinstance(ton_amount, int):
+        return ton_amount * NANOTON_PER_TON
+    # scaleb сдвигает экспоненту без деления/умножения в Decimal
+    return int(ton_amount.scaleb(9))
 
 
 def convert_nano_to_ton(nano_amount: int) -> Decimal:
@@ -59,7 +90,7 @@ def convert_nano_to_ton(nano_amount: int) -> Decimal:
     Returns:
         Decimal: Сумма в TON
     """
-    return Decimal(nano_amount) / Decimal('1000000000')
+    return Decimal(nano_amount).scaleb(-9)
 
 
 def calculate_metadata_hash(deal_data: Dict[str, Any]) -> bytes:
@@ -72,16 +103,33 @@ def calculate_metadata_hash(deal_data: Dict[str, Any]) -> bytes:
     Returns:
         bytes: Hash метаданных
     """
-    # Формируем строку из данных для хеширования
-    metadata_string = (
-        f"{deal_data.get('deal_id')}-"
-        f"{deal_data.get('order_title')}-"
-        f"{deal_data.get('created_at')}"
+    return _metadata_hash(
+        deal_data.get('deal_id'),
+        deal_data.get('order_title'),
+        deal_data.get('created_at')
     )
-    
-    # Вычисляем SHA256 hash
-    hash_obj = hashlib.sha256(metadata_string.encode('utf-8'))
-    return hash_obj.digest()
+
+
+@functools.lru_cache(maxsize=1024)
+def _metadata_hash(deal_id: Any, order_title: Any, created_at: Any) -> bytes:
+    """SHA256 от строки "deal_id-order_title-created_at" (кешируется по значениям полей)."""
+    metadata_string = f"{deal_id}-{order_title}-{created_at}"
+    return hashlib.sha256(metadata_string.encode('utf-8')).digest()
+
+
+def _mock_contract_address(params: DealOnchainParams) -> str:
+    """
+    Генерирует детерминированный mock-адрес контракта (деплой без сети/кошелька).
+
+    Args:
+        params: Параметры сделки
+
+    Returns:
+        str: Mock-адрес в формате EQC...
+    """
+    mock_address = f"EQC{hashlib.sha256(params._canonical_bytes()).hexdigest()[:48]}"
+    logger.info(f"Mock deployment, generated address: {mock_address}")
+    return mock_address
 
 
 def deploy_onchain_deal(params: DealOnchainParams) -> str:
@@ -101,7 +149,7 @@ def deploy_onchain_deal(params: DealOnchainParams) -> str:
     
     # Проверяем наличие необходимых зависимостей
     try:
-        from .ton_client import TonCenterClient
+        from .ton_client import get_client
         from .ton_wallet import TonWalletService
         from .ton_contracts import (
             load_deal_code_cell,
@@ -110,21 +158,17 @@ def deploy_onchain_deal(params: DealOnchainParams) -> str:
         )
     except ImportError as e:
         logger.warning(f"TON dependencies not available: {e}, using mock deployment")
-        mock_address = f"EQC{hashlib.sha256(str(params).encode()).hexdigest()[:48]}"
-        logger.info(f"Mock deployment, generated address: {mock_address}")
-        return mock_address
+        return _mock_contract_address(params)
     
     # Проверяем наличие mnemonic кошелька
     mnemonic = os.environ.get('TON_MNEMONIC')
     if not mnemonic:
         logger.warning("TON_MNEMONIC not set, using mock deployment")
-        mock_address = f"EQC{hashlib.sha256(str(params).encode()).hexdigest()[:48]}"
-        logger.info(f"Mock deployment, generated address: {mock_address}")
-        return mock_address
+        return _mock_contract_address(params)
     
     try:
         # Инициализируем клиенты
-        ton_client = TonCenterClient()
+        ton_client = get_client()
         wallet_service = TonWalletService(mnemonic=mnemonic, ton_client=ton_client)
         
         # Загружаем код контракта
@@ -132,9 +176,7 @@ def deploy_onchain_deal(params: DealOnchainParams) -> str:
             code_cell = load_deal_code_cell()
         except ValueError as e:
             logger.warning(f"Deal contract code not available: {e}, using mock deployment")
-            mock_address = f"EQC{hashlib.sha256(str(params).encode()).hexdigest()[:48]}"
-            logger.info(f"Mock deployment, generated address: {mock_address}")
-            return mock_address
+            return _mock_contract_address(params)
         
         # Собираем init data
         init_params = {
@@ -142,11 +184,11 @@ def deploy_onchain_deal(params: DealOnchainParams) -> str:
             'buyer_address': params.buyer_address,
             'service_wallet': params.service_wallet,
             'arbiter_wallet': params.arbiter_wallet,
-            'item_price_ton': convert_nano_to_ton(params.item_price_nano),
-            'buyer_fee_ton': convert_nano_to_ton(params.buyer_fee_nano),
-            'shipping_budget_ton': convert_nano_to_ton(params.shipping_budget_nano),
-            'service_fee_ton': convert_nano_to_ton(params.service_fee_nano),
-            'insurance_ton': convert_nano_to_ton(params.insurance_nano),
+            'item_price_nano': params.item_price_nano,
+            'buyer_fee_nano': params.buyer_fee_nano,
+            'shipping_budget_nano': params.shipping_budget_nano,
+            'service_fee_nano': params.service_fee_nano,
+            'insurance_nano': params.insurance_nano,
             'purchase_deadline_ts': params.purchase_deadline_ts,
             'ship_deadline_ts': params.ship_deadline_ts,
             'confirm_deadline_ts': params.confirm_deadline_ts,
@@ -160,48 +202,31 @@ def deploy_onchain_deal(params: DealOnchainParams) -> str:
         # buyer_payout = actual_item_price + actual_shipping_cost + buyer_reward
         # Максимум = item_price_max + shipping_budget + buyer_reward
         # Service_fee и insurance НЕ входят в escrow (остаются у сервиса)
-        total_amount_ton = (
-            convert_nano_to_ton(params.item_price_nano) +
-            convert_nano_to_ton(params.shipping_budget_nano) +
-            convert_nano_to_ton(params.buyer_fee_nano)
+        total_amount_ton = convert_nano_to_ton(
+            params.item_price_nano +
+            params.shipping_budget_nano +
+            params.buyer_fee_nano
         )
         
-        # Деплоим контракт
-        # Для деплоя отправляем минимальную сумму (~0.1 TON), основную сумму escrow отправляем после
-        deploy_amount_ton = Decimal('0.1')  # Минимальная сумма для деплоя (газ + комиссии)
-        
-        logger.info(f"Deploying contract (initial deploy: {deploy_amount_ton} TON, escrow will be {total_amount_ton} TON)")
+        # Деплоим контракт: escrow передается в том же сообщении, что и state_init
+        # (газ на активацию списывается из этой суммы)
+        logger.info(f"Deploying contract with escrow {total_amount_ton} TON")
         contract_address = wallet_service.deploy_contract(
             code_cell=code_cell,
             init_data_cell=init_data_cell,
-            amount_ton=deploy_amount_ton,  # Используем минимальную сумму для деплоя
+            amount_ton=total_amount_ton,
             comment=f"Deploy Deal contract for deal"
         )
         
         logger.info(f"Contract deployed successfully: {contract_address}")
         
-        # После успешного деплоя отправляем основную сумму escrow
-        if total_amount_ton > deploy_amount_ton:
-            escrow_amount = total_amount_ton - deploy_amount_ton
-            logger.info(f"Sending escrow amount {escrow_amount} TON to deployed contract")
-            try:
-                wallet_service.send_transfer(
-                    to_address=contract_address,
-                    amount_ton=escrow_amount,
-                    comment="Escrow for Deal contract"
-                )
-                logger.info(f"Escrow amount sent successfully")
-            except Exception as e:
-                logger.warning(f"Failed to send escrow amount: {e}. Contract is deployed, but escrow needs to be sent manually.")
-        
         return contract_address
         
     except Exception as e:
         logger.error(f"Error deploying contract: {e}", exc_info=True)
         # Fallback на mock в случае ошибки
         logger.warning("Falling back to mock deployment due to error")
-        mock_address = f"EQC{hashlib.sha256(str(params).encode()).hexdigest()[:48]}"
-        return mock_address
+        return _mock_contract_address(params)
 
 
 def call_contract_method(
@@ -218,17 +243,18 @@ def call_contract_method(
         params: Параметры метода (для GET методов)
 
     Returns:
-        dict: Результат вызова метода
+        dict: Результат вызова метода (success=False, если метод завершился
+        с ненулевым exit_code или вызов не удался)
 
     Raises:
-        Exception: Если вызов не удался
+        TonCenterError: Если запрос к TonCenter не удался (сеть, 429, 5xx)
     """
     logger.info(f"Calling contract method {method_name} on {contract_address}")
     
     try:
-        from .ton_client import TonCenterClient
+        from .ton_client import get_client
         
-        ton_client = TonCenterClient()
+        ton_client = get_client()
         
         # Выполняем GET метод (read-only)
         result = ton_client.run_get_method(
@@ -237,6 +263,17 @@ def call_contract_method(
             stack=params.get('stack') if params else None
         )
         
+        # Отказ самого контракта (exit_code кроме 0/1) - не ошибка сети
+        exit_code = result.get('exit_code', 0) if isinstance(result, dict) else 0
+        if exit_code not in (0, 1):
+            logger.warning(f"Contract method {method_name} exited with code {exit_code}")
+            return {
+                'success': False,
+                'error': f"exit_code {exit_code}",
+                'method': method_name,
+                'result': result,
+            }
+        
         logger.info(f"Contract method {method_name} called successfully")
         return {
             'success': True,
@@ -251,6 +288,9 @@ def call_contract_method(
             'tx_hash': f"mock_{hashlib.sha256(f'{contract_address}{method_name}'.encode()).hexdigest()}",
             'method': method_name,
         }
+    except TonCenterError:
+        # Временные сбои TonCenter пробрасываем - их повторяет вызывающий код
+        raise
     except Exception as e:
         logger.error(f"Error calling contract method: {e}", exc_info=True)
         # Возвращаем mock результат в случае ошибки
@@ -261,6 +301,17 @@ def call_contract_method(
         }
 
 
+def _last_transaction_lt(address_info: Dict[str, Any]) -> Optional[int]:
+    """
+    Извлекает lt последней транзакции контракта из ответа getAddressInformation.
+
+    Returns:
+        Optional[int]: lt или None, если контракт еще без транзакций
+    """
+    lt = (address_info.get('last_transaction_id') or {}).get('lt')
+    return int(lt) if lt else None
+
+
 def get_contract_state(contract_address: str) -> Dict[str, Any]:
     """
     Получает состояние смарт-контракта.
@@ -272,14 +323,14 @@ def get_contract_state(contract_address: str) -> Dict[str, Any]:
         dict: Состояние контракта
 
     Raises:
-        Exception: Если запрос не удался
+        TonCenterError: Если запрос к TonCenter не удался
     """
     logger.info(f"Getting contract state for {contract_address}")
     
     try:
-        from .ton_client import TonCenterClient
+        from .ton_client import get_client
         
-        ton_client = TonCenterClient()
+        ton_client = get_client()
         address_info = ton_client.get_address_information(contract_address)
         
         # Парсим состояние из ответа TonCenter
@@ -289,6 +340,7 @@ def get_contract_state(contract_address: str) -> Dict[str, Any]:
         result = {
             'status': 'active' if state == 'active' else state,
             'balance': str(balance),
+            'last_lt': _last_transaction_lt(address_info),
             'data': address_info,
         }
         
@@ -302,6 +354,8 @@ def get_contract_state(contract_address: str) -> Dict[str, Any]:
             'balance': '1000000000',  # nanoTON
             'data': {},
         }
+    except TonCenterError:
+        raise
     except Exception as e:
         logger.error(f"Error getting contract state: {e}", exc_info=True)
         # Возвращаем mock состояние в случае ошибки
@@ -312,6 +366,27 @@ def get_contract_state(contract_address: str) -> Dict[str, Any]:
         }
 
 
+@functools.lru_cache(maxsize=None)
+def _contract_status_mapping() -> Dict[str, Any]:
+    """
+    Маппинг статусов контракта на статусы Deal.
+
+    Это зависит от конкретной реализации контракта. Строится один раз
+    при первом вызове: модели нельзя импортировать на уровне модуля,
+    ton_utils импортируется и до готовности реестра приложений.
+    """
+    from core.models import Deal
+
+    return {
+        'FUNDED': Deal.Status.FUNDED,
+        'PURCHASED': Deal.Status.PURCHASED,
+        'SHIPPED': Deal.Status.SHIPPED,
+        'COMPLETED': Deal.Status.COMPLETED,
+        'CANCELLED': Deal.Status.CANCELLED_REFUND_CUSTOMER,
+        'DISPUTE': Deal.Status.DISPUTE,
+    }
+
+
 def sync_deal_status_from_chain(onchain_deal) -> None:
     """
     Синхронизирует статус off-chain сделки со статусом on-chain контракта.
@@ -322,40 +397,50 @@ def sync_deal_status_from_chain(onchain_deal) -> None:
     Returns:
         None
     """
-    from core.models import Deal
-    
     logger.info(f"Syncing deal status for onchain_deal {onchain_deal.contract_address}")
     
     try:
         # Получаем состояние контракта
         contract_state = get_contract_state(onchain_deal.contract_address)
-        
-        # Извлекаем статус из состояния контракта
-        # TODO: Парсить реальное состояние контракта
-        # Пока заглушка
-        contract_status = contract_state.get('status', 'UNKNOWN')
-        
-        deal = onchain_deal.deal
-        
-        # Маппинг статусов контракта на статусы Deal
-        # Это зависит от конкретной реализации контракта
-        status_mapping = {
-            'FUNDED': Deal.Status.FUNDED,
-            'PURCHASED': Deal.Status.PURCHASED,
-            'SHIPPED': Deal.Status.SHIPPED,
-            'COMPLETED': Deal.Status.COMPLETED,
-            'CANCELLED': Deal.Status.CANCELLED_REFUND_CUSTOMER,
-            'DISPUTE': Deal.Status.DISPUTE,
-        }
-        
-        if contract_status in status_mapping:
-            new_status = status_mapping[contract_status]
-            if deal.status != new_status:
-                logger.info(f"Updating deal {deal.id} status from {deal.status} to {new_status}")
-                deal.status = new_status
-                deal.save()
-        
+        apply_contract_state(onchain_deal, contract_state)
     except Exception as e:
         logger.error(f"Error syncing deal status: {e}", exc_info=True)
         raise
 
+
+def apply_contract_state(onchain_deal, contract_state: Dict[str, Any]) -> None:
+    """
+    Обновляет статус сделки по уже полученному состоянию контракта.
+
+    Не обращается к сети: позволяет запросить состояние (get_contract_state)
+    вне транзакции и записать результат в короткой транзакции.
+
+    Args:
+        onchain_deal: Объект OnchainDeal
+        contract_state: Состояние контракта из get_contract_state
+
+    Returns:
+        None
+    """
+    # Новых транзакций с прошлой синхронизации нет - статус не изменился
+    last_lt = contract_state.get('last_lt')
+    if last_lt is not None and last_lt == onchain_deal.last_synced_lt:
+        logger.debug(f"No new transactions for {onchain_deal.contract_address}, skipping")
+        return
+    
+    # Извлекаем статус из состояния контракта
+    # TODO: Парсить реальное состояние контракта
+    # Пока заглушка
+    contract_status = contract_state.get('status', 'UNKNOWN')
+    
+    deal = onchain_deal.deal
+    new_status = _contract_status_mapping().get(contract_status)
+    
+    if new_status is not None and deal.status != new_status:
+        logger.info(f"Updating deal {deal.id} status from {deal.status} to {new_status}")
+        deal.status = new_status
+        deal.save()
+    
+    if last_lt is not None:
+        onchain_deal.last_synced_lt = last_lt
+        onchain_deal.save(update_fields=['last_synced_lt', 'updated_at'])
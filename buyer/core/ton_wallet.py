@@ -4,29 +4,97 @@
 Модуль для управления сервисным кошельком, подписи и отправки транзакций.
 """
 
+import functools
+import hashlib
 import os
-from typing import Optional, Dict
+import threading
+from base64 import b64encode
+from typing import Any, Dict, List, Optional, Tuple
 from decimal import Decimal
 import logging
 
 try:
     from tonsdk.contract.wallet import Wallets, WalletVersionEnum
-    from tonsdk.utils import to_nano, bytes_to_b64str, b64str_to_bytes
-    from tonsdk.boc import Cell
+    from tonsdk.crypto.exceptions import InvalidMnemonicsError
+    from tonsdk.utils import b64str_to_bytes
+    from tonsdk.boc import Cell, begin_cell
+    from tonsdk.contract import Contract
+    from tonsdk.utils import Address
     TONSDK_AVAILABLE = True
 except ImportError:
     TONSDK_AVAILABLE = False
     Wallets = None
     WalletVersionEnum = None
-    to_nano = None
-    bytes_to_b64str = None
+    InvalidMnemonicsError = None
     b64str_to_bytes = None
     Cell = None
+    begin_cell = None
+    Contract = None
+    Address = None
 
-from .ton_client import TonCenterClient
+from .ton_client import AsyncTonCenterClient, TonCenterClient, get_client
+from .ton_utils import convert_ton_to_nano
+
+# Деплой с ручным state_init (опционально: нужны tonsdk и pynacl)
+try:
+    from .ton_deploy_tonutils import TONSDK_AVAILABLE as _TONUTILS_AVAILABLE
+    from .ton_deploy_tonutils import deploy_contract_with_manual_state_init
+except ImportError:
+    _TONUTILS_AVAILABLE = False
+_deploy_tonutils = deploy_contract_with_manual_state_init if _TONUTILS_AVAILABLE else None
 
 logger = logging.getLogger(__name__)
 
+# Максимум исходящих сообщений в одном внешнем сообщении кошелька v3/v4
+MAX_MESSAGES_PER_TRANSFER = 4
+
+# send_mode для переводов: комиссия отдельно, ошибки игнорируются
+TRANSFER_SEND_MODE = 3
+
+def _amount_to_nano(amount_ton) -> int:
+    """Переводит сумму в nanoTON точно, без промежуточного float (float и строки - через str())."""
+    if not isinstance(amount_ton, (Decimal, int)):
+        amount_ton = Decimal(str(amount_ton))
+    return convert_ton_to_nano(amount_ton)
+
+
+@functools.lru_cache(maxsize=256)
+def _comment_payload_cell(comment: str) -> Cell:
+    """
+    Собирает payload с текстовым комментарием (op = 0 + строка).
+    
+    Кешируется: при массовых переводах комментарии повторяются, а tonsdk
+    не изменяет переданный payload (копирует биты или ссылается на него).
+    """
+    return begin_cell().store_uint(0, 32).store_string(comment).end_cell()
+
+
+# Кошельки, выведенные из mnemonic: (sha256(mnemonic), версия, workchain) -> кошелек
+_WALLET_CACHE: Dict[Tuple[bytes, Any, int], Any] = {}
+_WALLET_CACHE_LOCK = threading.Lock()
+
+
+def _wallet_from_mnemonic(mnemonic_words: List[str], wallet_enum):
+    """
+    Создает объект кошелька tonsdk из mnemonic (PBKDF2 + вывод ключей Ed25519).
+    
+    Args:
+        mnemonic_words: Слова mnemonic фразы
+        wallet_enum: Версия кошелька (WalletVersionEnum)
+        
+    Returns:
+        Объект кошелька tonsdk
+        
+    Raises:
+        ValueError: Если mnemonic невалидна
+    """
+    try:
+        # Wallets.from_mnemonics возвращает (mnemonics, public_key, private_key, wallet)
+        _, _, _, wallet = Wallets.from_mnemonics(mnemonic_words, wallet_enum, 0)
+    except InvalidMnemonicsError as e:
+        raise ValueError("Invalid wallet mnemonic") from e
+    return wallet
+
 
 class TonWalletService:
     """
@@ -65,7 +133,7 @@ class TonWalletService:
                 "TON_MNEMONIC environment variable or mnemonic parameter is required"
             )
         
-        self.ton_client = ton_client or TonCenterClient()
+        self.ton_client = ton_client or get_client()
         
         # Определяем версию кошелька (из ENV или параметра, по умолчанию v3r2)
         if wallet_version is None:
@@ -75,7 +143,13 @@ class TonWalletService:
             "v3r2": WalletVersionEnum.v3r2,
             "v4r2": WalletVersionEnum.v4r2,
         }
-        wallet_enum = wallet_version_map.get(wallet_version, WalletVersionEnum.v3r2)  # По умолчанию v3r2
+        wallet_enum = wallet_version_map.get(wallet_version)
+        if wallet_enum is None:
+            # Неизвестная версия дала бы другой адрес кошелька - падаем сразу
+            raise ValueError(
+                f"Unsupported wallet_version={wallet_version}, expected one of: {', '.join(wallet_version_map)}"
+            )
+        self.wallet_version = wallet_version
         
         # Создаем кошелек из mnemonic
         mnemonic_words = self.mnemonic.split()
@@ -84,76 +158,20 @@ class TonWalletService:
                 f"Invalid mnemonic: expected 24 words, got {len(mnemonic_words)}"
             )
         
-        # Используем from_mnemonics (множественное число) - это правильный метод в tonsdk
-        try:
-            wallet_result = Wallets.from_mnemonics(
-                mnemonics=mnemonic_words,
-                wallet_version=wallet_enum,
-                workchain=0,
-            )
-            
-            # Обрабатываем результат - может быть кортеж или объект
-            if isinstance(wallet_result, tuple):
-                # Если кортеж, ищем элемент с атрибутом 'address' (это и есть wallet объект)
-                wallet = None
-                for item in wallet_result:
-                    if hasattr(item, 'address'):
-                        wallet = item
-                        break
-                
-                # Если не нашли в кортеже, пробуем первый элемент
-                if wallet is None and len(wallet_result) > 0:
-                    first_item = wallet_result[0]
-                    if isinstance(first_item, (list, tuple)) and len(first_item) > 0:
-                        wallet = first_item[0]
-                    else:
-                        wallet = first_item
-                
-                if wallet is None or not hasattr(wallet, 'address'):
-                    raise ValueError(
-                        f"Could not find wallet object with 'address' attribute. "
-                        f"Result type: {type(wallet_result)}, "
-                        f"Result length: {len(wallet_result)}"
-                    )
-                
-                self.wallet = wallet
-            else:
-                self.wallet = wallet_result
-                
-        except AttributeError:
-            # Fallback для старых версий tonsdk
-            if hasattr(Wallets, 'from_mnemonic'):
-                wallet_result = Wallets.from_mnemonic(
-                    mnemonic=mnemonic_words,
-                    wallet_version=wallet_enum,
-                    workchain=0,
-                )
-                # Обрабатываем результат (может быть тоже кортеж)
-                if isinstance(wallet_result, tuple):
-                    wallet = None
-                    for item in wallet_result:
-                        if hasattr(item, 'address'):
-                            wallet = item
-                            break
-                    self.wallet = wallet if wallet else wallet_result[0]
-                else:
-                    self.wallet = wallet_result
-            else:
-                raise ValueError(
-                    f"Wallets class does not have from_mnemonics or from_mnemonic method. "
-                    f"Available methods: {[m for m in dir(Wallets) if 'mne' in m.lower() and not m.startswith('_')]}"
-                )
-        
-        # Проверяем, что wallet имеет атрибут address
-        if not hasattr(self.wallet, 'address'):
-            raise ValueError(
-                f"Wallet object missing 'address' attribute. "
-                f"Type: {type(self.wallet)}"
-            )
+        # Вывод кошелька из mnemonic детерминирован и дорог (PBKDF2),
+        # поэтому объект кошелька кешируется между экземплярами сервиса
+        cache_key = (hashlib.sha256(self.mnemonic.encode("utf-8")).digest(), wallet_enum, 0)
+        with _WALLET_CACHE_LOCK:
+            wallet = _WALLET_CACHE.get(cache_key)
+        if wallet is None:
+            wallet = _wallet_from_mnemonic(mnemonic_words, wallet_enum)
+            with _WALLET_CACHE_LOCK:
+                _WALLET_CACHE[cache_key] = wallet
+        self.wallet = wallet
         
         self.address = self.wallet.address.to_string(True, True, True)
         
-        logger.info(f"TonWalletService initialized: address={self.address}")
+        logger.info("TonWalletService initialized: address=%s", self.address)
     
     def get_seqno(self) -> int:
         """
@@ -164,6 +182,18 @@ class TonWalletService:
         """
         return self.ton_client.get_wallet_seqno(self.address)
     
+    async def get_seqno_async(self, client: AsyncTonCenterClient) -> int:
+        """
+        Асинхронно получает seqno кошелька (без блокировки цикла событий).
+        
+        Args:
+            client: Открытый (async with) AsyncTonCenterClient
+            
+        Returns:
+            int: Текущий seqno кошелька
+        """
+        return await client.get_wallet_seqno(self.address)
+    
     def deploy_contract(
         self,
         code_cell: Cell,
@@ -188,67 +218,35 @@ class TonWalletService:
         Raises:
             Exception: Если деплой не удался
         """
-        from tonsdk.boc import begin_cell
-        
-        logger.info(f"Deploying contract with amount {amount_ton} TON")
-        
-        # Собираем state_init согласно структуре TON:
-        # StateInit {
-        #   split_depth: Maybe (## 5)
-        #   special: Maybe TickTock
-        #   code: Maybe ^Cell
-        #   data: Maybe ^Cell
-        #   library: Maybe ^Cell
-        # }
-        # Формат: split_depth(1 bit) + special(1 bit) + code(1 bit + ref) + data(1 bit + ref) + library(1 bit)
-        state_init = (
-            begin_cell()
-            .store_bit(0)  # split_depth = None (0 = отсутствует)
-            .store_bit(0)  # special = None (0 = отсутствует)
-            .store_bit(1)  # code = Some (1 = присутствует)
-            .store_ref(code_cell)
-            .store_bit(1)  # data = Some (1 = присутствует)
-            .store_ref(init_data_cell)
-            .store_bit(0)  # library = None (0 = отсутствует)
-            .end_cell()
-        )
+        from core.ton_contracts import state_init_and_address
         
-        # Вычисляем адрес контракта
-        from core.ton_contracts import calculate_contract_address
-        contract_address = calculate_contract_address(code_cell, init_data_cell)
+        logger.info("Deploying contract with amount %s TON", amount_ton)
         
-        logger.info(f"Contract address: {contract_address}")
+        # Собираем state_init (split_depth: None, special: None, code, data, library: None)
+        state_init, contract_address = state_init_and_address(code_cell, init_data_cell)
         
-        # Получаем seqno кошелька
-        seqno = self.get_seqno()
-        logger.debug(f"Wallet seqno: {seqno}")
+        logger.info("Contract address: %s", contract_address)
         
-        # Проверяем статус кошелька
-        try:
-            addr_info = self.ton_client.get_address_information(self.address)
-            wallet_state = addr_info.get("state", "")
-            logger.debug(f"Wallet state: {wallet_state}")
-        except Exception as e:
-            logger.warning(f"Could not get wallet state: {e}")
-            wallet_state = "unknown"
+        # Получаем seqno и статус кошелька одним getAddressInformation
+        bundle = self.ton_client.get_wallet_state_bundle(self.address)
+        seqno, wallet_state = bundle["seqno"], bundle["state"]
+        logger.debug("Wallet seqno: %s, state: %s", seqno, wallet_state)
         
         # Если seqno=0 и кошелек active, возможно метод seqno недоступен
         # В этом случае кошелек все равно может работать, но нужно проверить баланс
         if seqno == 0 and wallet_state == "active":
             logger.warning(
-                f"Seqno=0 but wallet is active. "
-                f"This might be an issue with get_seqno method. "
-                f"Trying to proceed with seqno=0..."
+                "Seqno=0 but wallet is active. "
+                "This might be an issue with get_seqno method. "
+                "Trying to proceed with seqno=0..."
             )
         
         # Для деплоя нового контракта через кошелек v3r2 используем create_transfer_message
         # но с правильными параметрами для v3r2
         
-        # Для деплоя отправляем достаточную сумму для активации контракта
-        # Минимум ~0.1 TON для газа и комиссий, но лучше 0.2-0.3 TON для надежности
-        # Основную сумму escrow нужно отправить отдельной транзакцией после деплоя
-        deploy_amount_ton = min(amount_ton, Decimal('0.2'))  # Увеличено до 0.2 TON для надежной активации
-        deploy_amount_nano = to_nano(float(deploy_amount_ton), "ton")
+        # Вся сумма (газ на активацию + escrow) уходит одним сообщением вместе со state_init
+        deploy_amount_ton = amount_ton
+        deploy_amount_nano = _amount_to_nano(deploy_amount_ton)
         
         # Для v3r2 кошелька при деплое контракта нужно использовать правильный формат
         # Попробуем без state_init в transfer message, а создадим внешнее сообщение отдельно
@@ -258,18 +256,29 @@ class TonWalletService:
         # или send_mode=128 (external message)
         # Но create_transfer_message создает внутреннее сообщение, поэтому используем send_mode=1
         
-        logger.info(f"Creating transfer message for contract deployment (seqno={seqno}, amount={deploy_amount_ton} TON)")
+        logger.info("Creating transfer message for contract deployment (seqno=%s, amount=%s TON)", seqno, deploy_amount_ton)
+        
+        if use_manual_state_init and _deploy_tonutils is None:
+            logger.warning("Manual state_init deployment method not available, falling back to tonsdk")
+            use_manual_state_init = False
+        
+        if use_manual_state_init and self.wallet_version != "v3r2":
+            # Ручной деплой подписывает от кошелька v3r2, выведенного из mnemonic:
+            # у другой версии другой адрес и seqno
+            logger.warning(
+                "Manual state_init deployment supports only v3r2 wallets (wallet_version=%s), using tonsdk",
+                self.wallet_version
+            )
+            use_manual_state_init = False
         
         if use_manual_state_init:
             # Используем tonutils-py для деплоя с гарантированным state_init
             logger.info("Using tonutils-py deployment method (guaranteed state_init)")
             try:
-                from core.ton_deploy_tonutils import deploy_contract_with_manual_state_init
-                
                 # Определяем network из URL
                 network = "testnet" if "testnet" in self.ton_client.base_url.lower() else "mainnet"
                 
-                contract_addr, tx_hash = deploy_contract_with_manual_state_init(
+                contract_addr, tx_hash = _deploy_tonutils(
                     code_cell=code_cell,
                     init_data_cell=init_data_cell,
                     amount_ton=deploy_amount_ton,
@@ -277,13 +286,10 @@ class TonWalletService:
                     seqno=seqno,
                     network=network
                 )
-                logger.info(f"Contract deployed successfully via tonutils-py: {contract_addr}, tx: {tx_hash}")
+                logger.info("Contract deployed successfully via tonutils-py: %s, tx: %s", contract_addr, tx_hash)
                 return contract_addr
-            except ImportError as e:
-                logger.warning(f"Manual state_init deployment method not available: {e}, falling back to tonsdk")
-                use_manual_state_init = False
             except Exception as e:
-                logger.error(f"Manual state_init deployment failed: {e}, falling back to tonsdk")
+                logger.error("Manual state_init deployment failed: %s, falling back to tonsdk", e)
                 logger.exception(e)
                 use_manual_state_init = False
         
@@ -302,24 +308,67 @@ class TonWalletService:
             )
             
             # Получаем BOC транзакции
-            boc = query["message"].to_boc(False)
-            boc_b64 = bytes_to_b64str(boc)
+            # Без CRC32C: в tonsdk он считается побитовым циклом на Python, а поле необязательное
+            boc = query["message"].to_boc(has_idx=False, hash_crc32=False)
+            boc_b64 = b64encode(boc).decode("ascii")
             
-            logger.info(f"Sending deploy transaction to TON network")
-            logger.debug(f"BOC length: {len(boc)} bytes, BOC base64 length: {len(boc_b64)} chars")
-            logger.debug(f"BOC base64 (first 100 chars): {boc_b64[:100]}...")
+            logger.info("Sending deploy transaction to TON network")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("BOC length: %s bytes, BOC base64 length: %s chars", len(boc), len(boc_b64))
+                logger.debug("BOC base64 (first 100 chars): %s...", boc_b64[:100])
             
             # Отправляем через TonCenter
             try:
                 result = self.ton_client.send_boc(boc_b64)
-                logger.info(f"Deploy transaction sent successfully: {result}")
+                logger.info("Deploy transaction sent successfully: %s", result)
             except Exception as e:
-                logger.error(f"Failed to send deploy transaction: {e}")
-                logger.error(f"BOC that failed: {boc_b64[:200]}...")
+                logger.error("Failed to send deploy transaction: %s", e)
+                logger.error("BOC that failed: %s...", boc_b64[:200])
                 raise
         
         return contract_address
     
+    async def deploy_contract_async(
+        self,
+        code_cell: Cell,
+        init_data_cell: Cell,
+        amount_ton: Decimal
+    ) -> str:
+        """
+        Асинхронный вариант deploy_contract (ручной state_init).
+        
+        Получение seqno и отправка BOC идут через одно HTTP/2 соединение
+        AsyncTonCenterClient; запрос seqno (getAddressInformation и runGetMethod)
+        выполняется параллельно.
+        
+        Args:
+            code_cell: Cell с кодом контракта
+            init_data_cell: Cell с init data контракта
+            amount_ton: Сумма в TON для отправки на контракт (escrow)
+            
+        Returns:
+            str: Адрес деплоенного контракта
+        """
+        from core.ton_contracts import state_init_and_address
+        from core.ton_deploy_tonutils import build_deploy_boc
+        
+        logger.info("Deploying contract (async) with amount %s TON", amount_ton)
+        
+        state_init, contract_address = state_init_and_address(code_cell, init_data_cell)
+        logger.info("Contract address: %s", contract_address)
+        
+        async with AsyncTonCenterClient(
+            api_key=self.ton_client.api_key,
+            base_url=self.ton_client.base_url
+        ) as client:
+            seqno = await self.get_seqno_async(client)
+            boc_b64 = build_deploy_boc(state_init, contract_address, amount_ton, self.wallet, seqno)
+            result = await client.send_boc(boc_b64)
+        
+        logger.info("Deploy transaction sent successfully: %s", result)
+        
+        return contract_address
+    
     def send_transfer(
         self,
         to_address: str,
@@ -339,29 +388,89 @@ class TonWalletService:
         Returns:
             dict: Результат отправки
         """
-        from tonsdk.boc import begin_cell
-        
-        logger.info(f"Sending {amount_ton} TON to {to_address}")
+        logger.info("Sending %s TON to %s", amount_ton, to_address)
         
         seqno = self.get_seqno()
         
         # Создаем payload
         if payload is None and comment:
-            payload = begin_cell().store_uint(0, 32).store_string(comment).end_cell()
+            payload = _comment_payload_cell(comment)
         
         query = self.wallet.create_transfer_message(
             to_addr=to_address,
-            amount=to_nano(float(amount_ton), "ton"),
+            amount=_amount_to_nano(amount_ton),
             seqno=seqno,
             payload=payload,
-            send_mode=3,
+            send_mode=TRANSFER_SEND_MODE,
         )
         
-        boc = query["message"].to_boc(False)
-        boc_b64 = bytes_to_b64str(boc)
+        boc = query["message"].to_boc(has_idx=False, hash_crc32=False)
+        boc_b64 = b64encode(boc).decode("ascii")
         
         result = self.ton_client.send_boc(boc_b64)
-        logger.info(f"Transfer sent successfully: {result}")
+        logger.info("Transfer sent successfully: %s", result)
         
         return result
-
+    
+    def _create_multi_transfer_message(self, transfers: List[Tuple[str, Decimal, Optional[str]]], seqno: int) -> Dict:
+        """
+        Создает одно подписанное внешнее сообщение с несколькими переводами.
+        
+        Args:
+            transfers: До MAX_MESSAGES_PER_TRANSFER кортежей (адрес, сумма в TON, комментарий)
+            seqno: seqno кошелька
+            
+        Returns:
+            dict: Результат create_external_message tonsdk (ключ "message" - Cell)
+        """
+        signing_message = self.wallet.create_signing_message(seqno)
+        for to_address, amount_ton, comment in transfers:
+            header = Contract.create_internal_message_header(
+                Address(to_address), Decimal(_amount_to_nano(amount_ton))
+            )
+            payload = _comment_payload_cell(comment) if comment else None
+            signing_message.bits.write_uint8(TRANSFER_SEND_MODE)
+            signing_message.refs.append(Contract.create_common_msg_info(header, None, payload))
+        return self.wallet.create_external_message(signing_message, seqno)
+    
+    async def send_transfers_batch(
+        self,
+        transfers: List[Tuple[str, Decimal, Optional[str]]],
+        seqno_timeout: float = 60.0
+    ) -> List[Dict]:
+        """
+        Отправляет пачку переводов минимальным числом внешних сообщений.
+        
+        Переводы упаковываются по MAX_MESSAGES_PER_TRANSFER в одно подписанное
+        сообщение (один seqno, один sendBoc). Пачки отправляются по очереди:
+        кошелек примет сообщение с seqno + 1 только после того, как предыдущее
+        попадет в блок, поэтому параллельная отправка невозможна.
+        
+        Args:
+            transfers: Кортежи (адрес получателя, сумма в TON, комментарий или None)
+            seqno_timeout: Сколько секунд ждать подтверждения предыдущей пачки
+            
+        Returns:
+            list: Результат sendBoc для каждой пачки
+        """
+        logger.info("Sending %s transfers in batches of %s", len(transfers), MAX_MESSAGES_PER_TRANSFER)
+        
+        results = []
+        async with AsyncTonCenterClient(
+            api_key=self.ton_client.api_key,
+            base_url=self.ton_client.base_url
+        ) as client:
+            seqno = await self.get_seqno_async(client)
+            for start in range(0, len(transfers), MAX_MESSAGES_PER_TRANSFER):
+                if start:
+                    seqno = await client.wait_wallet_seqno(self.address, seqno, seqno_timeout)
+                
+                query = self._create_multi_transfer_message(
+                    transfers[start:start + MAX_MESSAGES_PER_TRANSFER], seqno
+                )
+                boc_b64 = b64encode(query["message"].to_boc(has_idx=False, hash_crc32=False)).decode("ascii")
+                result = await client.send_boc(boc_b64)
+                results.append(result)
+        
+        logger.info("Batch transfer sent: %s messages", len(results))
+        return results
@@ -3,12 +3,22 @@
 
 Создает внутреннее сообщение вручную, гарантируя включение state_init.
 """
-import os
 import logging
+from base64 import b64encode
 from decimal import Decimal
-from typing import Optional
-from tonsdk.boc import begin_cell, Cell
-from tonsdk.utils import to_nano, bytes_to_b64str, Address
+
+try:
+    from tonsdk.boc import Cell
+    from tonsdk.contract.wallet import WalletV3ContractR2
+    TONSDK_AVAILABLE = True
+except ImportError:
+    TONSDK_AVAILABLE = False
+    Cell = None
+    WalletV3ContractR2 = None
+
+from core.ton_client import get_client
+from core.ton_contracts import amount_to_nano, state_init_and_address
+from core.ton_deploy_tonutils import mnemonic_to_ed25519
 
 logger = logging.getLogger(__name__)
 
@@ -33,55 +43,18 @@ def create_deploy_message_with_state_init(
     Returns:
         Cell: BOC внешнего сообщения кошелька с внутренним сообщением, содержащим state_init
     """
-    # Используем create_transfer_message но с модификацией внутреннего сообщения
-    # Создаем временное сообщение без state_init для получения структуры
-    temp_query = wallet.create_transfer_message(
+    # tonsdk включает state_init во внутреннее сообщение create_transfer_message
+    query_with_state = wallet.create_transfer_message(
         to_addr=contract_address,
         amount=amount_nano,
         seqno=seqno,
+        state_init=state_init,  # Передаем state_init напрямую
         payload=None,
         send_mode=3
     )
     
-    # Получаем внешнее сообщение
-    temp_message = temp_query["message"] if isinstance(temp_query, dict) else temp_query
-    
-    # Пробуем извлечь внутреннее сообщение и заменить его на версию с state_init
-    # Но это сложно, поэтому используем прямой подход через create_signing_message
-    
-    # Создаем внутреннее сообщение с state_init вручную
-    from tonsdk.utils import Address
-    wallet_addr = Address(wallet.address)
-    contract_addr = Address(contract_address)
-    
-    internal_message = (
-        begin_cell()
-        .store_uint(0, 1)  # ihr_disabled = 0
-        .store_uint(1, 1)  # bounce = 1
-        .store_uint(0, 1)  # bounced = 0
-        .store_address(wallet_addr)  # src
-        .store_address(contract_addr)  # dst
-        .store_coins(amount_nano)  # value
-        .store_bit(0)  # extra_currencies = None
-        .store_bit(1)  # init = Some
-        .store_ref(state_init)  # state_init
-        .store_bit(0)  # body = None
-        .end_cell()
-    )
-    
-        # Используем create_transfer_message с state_init напрямую
-        # tonsdk должен поддерживать state_init в create_transfer_message
-        query_with_state = wallet.create_transfer_message(
-            to_addr=contract_address,
-            amount=amount_nano,
-            seqno=seqno,
-            state_init=state_init,  # Передаем state_init напрямую
-            payload=None,
-            send_mode=3
-        )
-        
-        external_message = query_with_state["message"] if isinstance(query_with_state, dict) else query_with_state
-        return external_message
+    external_message = query_with_state["message"] if isinstance(query_with_state, dict) else query_with_state
+    return external_message
 
 
 def deploy_contract_with_manual_state_init(
@@ -106,135 +79,24 @@ def deploy_contract_with_manual_state_init(
     Returns:
         Tuple[str, str]: (contract_address, transaction_hash)
     """
-    from tonsdk.contract.wallet import Wallets, WalletVersionEnum
-    from tonsdk.crypto import private_key_to_public_key
-    from core.ton_contracts import calculate_contract_address
-    from core.ton_client import TonCenterClient
+    # tonsdk (и pynacl, от которого он зависит) проверяется один раз при импорте модуля
+    if not TONSDK_AVAILABLE:
+        raise ImportError(
+            "tonsdk and pynacl are required for contract deployment. "
+            "Install them with: pip install tonsdk pynacl"
+        )
     
     # Создаем state_init
-    state_init = (
-        begin_cell()
-        .store_bit(0)  # split_depth = None
-        .store_bit(0)  # special = None
-        .store_bit(1)  # code = Some
-        .store_ref(code_cell)
-        .store_bit(1)  # data = Some
-        .store_ref(init_data_cell)
-        .store_bit(0)  # library = None
-        .end_cell()
-    )
-    
-    # Вычисляем адрес контракта
-    contract_address = calculate_contract_address(code_cell, init_data_cell)
+    state_init, contract_address = state_init_and_address(code_cell, init_data_cell)
     logger.info(f"Contract address: {contract_address}")
     
-    # Получаем кошелек из mnemonic
-    mnemonic_words = wallet_mnemonic.split()
-    wallet_result = Wallets.from_mnemonics(
-        mnemonics=mnemonic_words,
-        wallet_version=WalletVersionEnum.v3r2,
-        workchain=0
-    )
-    
-    # Извлекаем wallet объект
-    if isinstance(wallet_result, tuple):
-        wallet = None
-        for item in wallet_result:
-            if hasattr(item, 'address'):
-                wallet = item
-                break
-        if wallet is None and len(wallet_result) > 0:
-            wallet = wallet_result[0]
-    else:
-        wallet = wallet_result
-    
-    wallet_address = wallet.address.to_string(True, True, True)
-    
-    # Получаем приватный и публичный ключи из wallet объекта
-    # Пробуем разные способы получения ключей
-    private_key = None
-    public_key = None
-    
-    # Способ 1: Прямо из wallet объекта
-    if hasattr(wallet, 'private_key'):
-        private_key_bytes = wallet.private_key
-        # Преобразуем в bytes если это не bytes
-        if isinstance(private_key_bytes, (list, tuple)):
-            private_key = bytes(private_key_bytes)
-        elif isinstance(private_key_bytes, bytes):
-            private_key = private_key_bytes
-        else:
-            # Попробуем получить через hex или другие методы
-            try:
-                private_key = bytes(private_key_bytes)
-            except:
-                pass
-    
-    # Способ 2: Из wallet.keys если есть
-    if private_key is None and hasattr(wallet, 'keys'):
-        keys = wallet.keys
-        if isinstance(keys, dict):
-            private_key = keys.get('private')
-            if isinstance(private_key, (list, tuple)):
-                private_key = bytes(private_key)
-        elif isinstance(keys, (list, tuple)) and len(keys) >= 2:
-            private_key = keys[0]
-            if isinstance(private_key, (list, tuple)):
-                private_key = bytes(private_key)
-    
-    # Способ 3: Используем tonsdk функции для правильной генерации Ed25519 ключей
-    if private_key is None:
-        try:
-            # Используем seed_to_private_key или другие tonsdk функции
-            from mnemonic import Mnemonic
-            import nacl.signing
-            import nacl.encoding
-            
-            mnemo = Mnemonic("english")
-            seed = mnemo.to_seed(wallet_mnemonic, passphrase="")
-            
-            # Для Ed25519 в TON используется HMAC-SHA512 для генерации ключей из seed
-            # Но проще всего использовать nacl с seed напрямую
-            # Ed25519 seed = первые 32 байта от HMAC-SHA512(seed, "ed25519 seed")
-            # Но на самом деле для простоты можно использовать первые 32 байта seed
-            # Главное - использовать их как seed для Ed25519, а не как готовый приватный ключ
-            
-            # Правильный способ для Ed25519:
-            # Для TON используется Ed25519, где seed (32 байта) используется для генерации ключей
-            # В nacl SigningKey создается из seed, и seed можно использовать как приватный ключ
-            ed25519_seed = seed[:32]  # Первые 32 байта seed для Ed25519
-            
-            # Создаем signing key из seed
-            signing_key = nacl.signing.SigningKey(ed25519_seed, encoder=nacl.encoding.RawEncoder)
-            
-            # В Ed25519 seed используется как приватный ключ (32 байта)
-            private_key = ed25519_seed  # Используем seed как приватный ключ
-            public_key = signing_key.verify_key.encode(encoder=nacl.encoding.RawEncoder)  # Публичный ключ (32 байта)
-            
-        except ImportError as e:
-            raise ImportError(f"Required libraries not available: {e}. Install: pip install mnemonic pynacl")
-        except Exception as e:
-            raise RuntimeError(f"Cannot generate Ed25519 keys from mnemonic: {e}")
-    
-    # Если публичный ключ не получен, вычисляем из приватного
-    if public_key is None and private_key is not None:
-        try:
-            from tonsdk.crypto import private_key_to_public_key
-            public_key = private_key_to_public_key(private_key)
-        except:
-            try:
-                import nacl.signing
-                import nacl.encoding
-                signing_key = nacl.signing.SigningKey(private_key, encoder=nacl.encoding.RawEncoder)
-                public_key = signing_key.verify_key.encode(encoder=nacl.encoding.RawEncoder)
-            except Exception as e:
-                raise RuntimeError(f"Cannot compute public key from private key: {e}")
-    
-    if private_key is None or public_key is None:
-        raise RuntimeError("Could not extract private/public keys from wallet")
+    # Получаем кошелек из закешированных ключей mnemonic (PBKDF2 - один раз на процесс);
+    # ключи выводятся одним путем, без перебора атрибутов кошелька
+    private_key, public_key = mnemonic_to_ed25519(wallet_mnemonic)
+    wallet = WalletV3ContractR2(public_key=public_key, private_key=private_key, wc=0)
     
     # Создаем сообщение с state_init используя wallet объект
-    amount_nano = to_nano(float(amount_ton), "ton")
+    amount_nano = amount_to_nano(amount_ton)
     external_message = create_deploy_message_with_state_init(
         wallet=wallet,
         contract_address=contract_address,
@@ -244,13 +106,13 @@ def deploy_contract_with_manual_state_init(
     )
     
     # Конвертируем в BOC
-    boc = external_message.to_boc(False)
-    boc_b64 = bytes_to_b64str(boc)
+    boc = external_message.to_boc(has_idx=False, hash_crc32=False)
+    boc_b64 = b64encode(boc).decode("ascii")
     
     logger.info(f"Deploy message created (size: {len(boc)} bytes)")
     
     # Отправляем через TonCenter
-    ton_client = TonCenterClient()
+    ton_client = get_client()
     result = ton_client.send_boc(boc_b64)
     
     logger.info(f"Deploy transaction sent: {result}")
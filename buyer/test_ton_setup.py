@@ -62,14 +62,10 @@ def check_ton_setup():
         code_cell = load_deal_code_cell()
         print(f"  ✓ Contract code loaded")
         
-        # Получаем hash из Cell через to_boc (как в ton_wallet.py)
+        # Representation hash ячейки (bytes_hash), а не SHA256 от BOC
         try:
-            from tonsdk.utils import bytes_to_b64str
-            cell_boc = code_cell.to_boc(False)  # False = без index
-            import hashlib
-            cell_hash = hashlib.sha256(cell_boc).hexdigest()[:16]
+            cell_hash = code_cell.bytes_hash().hex()[:16]
             print(f"    Code cell hash: {cell_hash}...")
-            print(f"    Code cell size: {len(cell_boc)} bytes")
         except Exception as hash_error:
             print(f"    Code cell loaded (could not compute hash: {hash_error})")
             print(f"    Cell type: {type(code_cell)}")
@@ -0,0 +1,33 @@
+# Generated manually to denormalize User.full_name
+
+from django.db import migrations, models
+
+
+def populate_full_names(apps, schema_editor):
+    """Заполняет full_name для существующих пользователей."""
+    User = apps.get_model('user', 'User')
+
+    users = list(User.objects.only('id', 'first_name', 'last_name'))
+    for user in users:
+        user.full_name = f"{user.first_name} {user.last_name}".strip()
+
+    User.objects.bulk_update(users, ['full_name'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_alter_user_phone_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='full_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=511),
+        ),
+        migrations.RunPython(
+            populate_full_names,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -15,6 +15,8 @@ class User(AbstractBaseUser):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
     email = models.CharField(max_length=255, null=True, blank=True)
+    # Денормализованное полное имя (first_name + last_name), обновляется в save()
+    full_name = models.CharField(max_length=511, blank=True, default='', editable=False)
     user_type = models.CharField(
         gettext_lazy('user type'),
         choices=UserType.choices,
@@ -35,6 +37,14 @@ class User(AbstractBaseUser):
         #     ("delete_documents", "Can delete documents"),
         # )
 
+    def save(self, *args, **kwargs):
+        """Сохраняет пользователя, пересчитывая денормализованное full_name."""
+        self.full_name = f"{self.first_name} {self.last_name}".strip()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'first_name', 'last_name'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'full_name'}
+        super().save(*args, **kwargs)
+
     def get_full_name(self) -> str:
         """Возвращает полное имя пользователя."""
         return f"{self.first_name} {self.last_name}".strip()